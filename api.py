@@ -0,0 +1,264 @@
+import gzip
+import hashlib
+import json
+from datetime import datetime
+from flask import Blueprint, abort, current_app, request
+from werkzeug.exceptions import HTTPException
+from models import db, Venue, Artist, Show, Genre
+from pagination import keyset_paginate, page_args
+from queries import load_shows, search, genre_filter, GENRES_BY_LOWER, GENRE_JUNCTIONS
+from routing import read_replica
+from show_stats import rolled_at
+
+#----------------------------------------------------------------------------#
+# JSON API.
+#----------------------------------------------------------------------------#
+
+# Read-only /api/v1 mirror of the HTML pages for machine clients. Every
+# endpoint selects plain columns (never ORM entities), and ?fields=a,b
+# narrows the select to just those columns. Responses carry a weak ETag
+# over the JSON body, answer If-None-Match with 304, and are gzipped when
+# the client accepts it.
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+class _Resource:
+    """Selectable fields of one resource and the columns it is paged by."""
+
+    def __init__(self, model, fields, keys, detail_fields=()):
+        self.model = model
+        self.fields = fields
+        self.keys = keys
+        self.detail_fields = tuple(detail_fields)
+
+    def selected(self, detail=False):
+        """Field names asked for with ?fields=, all of them by default."""
+        available = list(self.fields) + (list(self.detail_fields) if detail else [])
+        raw = request.args.get('fields')
+        if not raw:
+            return available
+        names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            abort(400, 'Unknown field(s): %s' % ', '.join(unknown))
+        return names
+
+    def query(self, names):
+        # key columns are always selected, under their own names, for the cursors
+        columns = {key.key: key for key in self.keys}
+        for name in names:
+            column = self.fields.get(name)
+            if column is not None:
+                columns[name] = column.label(name)
+        return db.session.query(*columns.values())
+
+
+# 'genres' is listed with no column: it comes from one junction query per page
+VENUES = _Resource(Venue, {
+    'id': Venue.id,
+    'name': Venue.name,
+    'genres': None,
+    'address': Venue.address,
+    'city': Venue.city,
+    'state': Venue.state,
+    'phone': Venue.phone,
+    'website': Venue.website_link,
+    'facebook_link': Venue.facebook_link,
+    'seeking_talent': Venue.looking_talent,
+    'seeking_description': Venue.seeking_description,
+    'image_link': Venue.image_link,
+    'upcoming_shows_count': Venue.upcoming_shows_count,
+    'past_shows_count': Venue.past_shows_count,
+}, keys=[Venue.id], detail_fields=['past_shows', 'upcoming_shows'])
+
+ARTISTS = _Resource(Artist, {
+    'id': Artist.id,
+    'name': Artist.name,
+    'genres': None,
+    'city': Artist.city,
+    'state': Artist.state,
+    'phone': Artist.phone,
+    'website': Artist.website,
+    'facebook_link': Artist.facebook_link,
+    'seeking_venue': Artist.seeking_venue,
+    'seeking_description': Artist.looking_description,
+    'image_link': Artist.image_link,
+    'upcoming_shows_count': Artist.upcoming_shows_count,
+    'past_shows_count': Artist.past_shows_count,
+}, keys=[Artist.id], detail_fields=['past_shows', 'upcoming_shows'])
+
+SHOWS = _Resource(Show, {
+    'id': Show.id,
+    'venue_id': Show.venue_id,
+    'venue_name': Venue.name,
+    'artist_id': Show.artist_id,
+    'artist_name': Artist.name,
+    'artist_image_link': Artist.image_link,
+    'start_time': Show.start_time,
+}, keys=[Show.start_time, Show.id])
+
+
+def _genres_by_id(model, ids):
+    entity_fk = GENRE_JUNCTIONS[model]
+    genres = {entity_id: [] for entity_id in ids}
+    if ids:
+        rows = db.session.query(entity_fk, Genre.name) \
+            .join(Genre, Genre.id == entity_fk.table.c.genre_id) \
+            .filter(entity_fk.in_(ids)) \
+            .order_by(Genre.id)
+        for entity_id, name in rows:
+            genres[entity_id].append(name)
+    return genres
+
+
+def _records(resource, rows, names):
+    genres = _genres_by_id(resource.model, [row.id for row in rows]) if 'genres' in names else {}
+    records = []
+    for row in rows:
+        record = {}
+        for name in names:
+            record[name] = genres[row.id] if name == 'genres' else getattr(row, name, None)
+        records.append(record)
+    return records
+
+
+#  Responses
+#  ----------------------------------------------------------------
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError('%r is not JSON serializable' % (value,))
+
+
+def json_response(payload, status=200):
+    body = json.dumps(payload, default=_json_default, separators=(',', ':')).encode('utf-8')
+    response = current_app.response_class(body, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if status != 200:
+        return response
+
+    # weak: the gzipped and plain bodies are the same representation
+    response.set_etag(hashlib.sha1(body).hexdigest(), weak=True)
+    response.cache_control.no_cache = True
+    response.make_conditional(request)
+    if (response.status_code == 200 and len(body) >= current_app.config['API_GZIP_MIN_SIZE']
+            and request.accept_encodings['gzip']):
+        response.set_data(gzip.compress(body, current_app.config['API_GZIP_LEVEL']))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def _page_payload(records, page):
+    return {
+        'data': records,
+        'next': page.next_cursor,
+        'prev': page.prev_cursor,
+    }
+
+
+def api_error(error):
+    return json_response({'error': error.name, 'message': error.description}, status=error.code)
+
+
+# by code as well: the app's own 404 handler would otherwise render HTML
+api.register_error_handler(HTTPException, api_error)
+for code in (400, 404):
+    api.register_error_handler(code, api_error)
+
+
+#  Venues and artists
+#  ----------------------------------------------------------------
+
+def _entity_list(resource):
+    names = resource.selected()
+    query = resource.query(names)
+    genre = GENRES_BY_LOWER.get(request.args.get('genre', '').lower())
+    if genre:
+        query = query.filter(genre_filter(resource.model, genre))
+    page = keyset_paginate(query, resource.keys, **page_args(request, current_app.config))
+    return json_response(_page_payload(_records(resource, page.items, names), page))
+
+
+def _entity_detail(resource, entity_id):
+    names = resource.selected(detail=True)
+    row = resource.query(names).filter(resource.model.id == entity_id).first()
+    if row is None:
+        abort(404)
+    record, = _records(resource, [row], [name for name in names if name in resource.fields])
+    if 'past_shows' in names or 'upcoming_shows' in names:
+        past_shows, upcoming_shows = load_shows(resource.model, entity_id, now=rolled_at())
+        record.update((name, shows) for name, shows in
+                      (('past_shows', past_shows), ('upcoming_shows', upcoming_shows)) if name in names)
+    return json_response({name: record[name] for name in names})
+
+
+@api.route('/venues')
+@read_replica
+def venues():
+    return _entity_list(VENUES)
+
+
+@api.route('/venues/<int:venue_id>')
+@read_replica
+def venue(venue_id):
+    return _entity_detail(VENUES, venue_id)
+
+
+@api.route('/artists')
+@read_replica
+def artists():
+    return _entity_list(ARTISTS)
+
+
+@api.route('/artists/<int:artist_id>')
+@read_replica
+def artist(artist_id):
+    return _entity_detail(ARTISTS, artist_id)
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@api.route('/shows')
+@read_replica
+def shows():
+    names = SHOWS.selected()
+    query = SHOWS.query(names).select_from(Show)
+    # join the counterparts only when one of their columns was asked for
+    if 'venue_name' in names:
+        query = query.join(Venue, Show.venue_id == Venue.id)
+    if 'artist_name' in names or 'artist_image_link' in names:
+        query = query.join(Artist, Show.artist_id == Artist.id)
+    page = keyset_paginate(query, SHOWS.keys, **page_args(request, current_app.config))
+    return json_response(_page_payload(_records(SHOWS, page.items, names), page))
+
+
+#  Search
+#  ----------------------------------------------------------------
+
+SEARCHABLE = {
+    'venues': Venue,
+    'artists': Artist,
+}
+
+
+@api.route('/search')
+@read_replica
+def search_all():
+    """?q=term, optionally narrowed with ?type=venues or ?type=artists."""
+    term = request.args.get('q', '')
+    kind = request.args.get('type')
+    if kind is not None and kind not in SEARCHABLE:
+        abort(400, 'type must be one of: %s' % ', '.join(SEARCHABLE))
+    payload = {}
+    for name, model in SEARCHABLE.items():
+        if kind in (None, name):
+            count, rows = search(model, term, limit=current_app.config['SEARCH_LIMIT'])
+            payload[name] = {
+                'count': count,
+                'data': [{'id': row.id, 'name': row.name, 'city': row.city, 'state': row.state}
+                         for row in rows],
+            }
+    return json_response(payload)
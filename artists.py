@@ -0,0 +1,226 @@
+import sys
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+from forms import ArtistForm
+from models import db, Artist
+from pagination import keyset_paginate, page_args
+from queries import load_detail, search, genre_filter, GENRES_BY_LOWER
+from cache import cached, add_cache_tags
+from conditional import conditional, catalog_stamp, entity_stamp
+from matching import suggestions_for
+from routing import read_replica
+from sql_profile import query_budget
+from show_stats import rolled_at
+
+#----------------------------------------------------------------------------#
+# Artists.
+#----------------------------------------------------------------------------#
+
+blueprint = Blueprint('artists', __name__)
+
+@blueprint.route('/artists')
+@read_replica
+@query_budget(2)
+@conditional(catalog_stamp)
+@cached('list:artists')
+def artists():
+  # a page of artists with their stored upcoming show counts
+  query = db.session.query(
+      Artist.id, Artist.name,
+      Artist.upcoming_shows_count.label('num_upcoming_shows'))
+  genre = GENRES_BY_LOWER.get(request.args.get('genre', '').lower())
+  if genre:
+    query = query.filter(genre_filter(Artist, genre))
+  page = keyset_paginate(query, [Artist.name, Artist.id], **page_args(request, current_app.config))
+
+  data = [{
+    'id': artist.id,
+    'name': artist.name,
+    'num_upcoming_shows': artist.num_upcoming_shows
+  } for artist in page.items]
+  return render_template('pages/artists.html', artists=data, page=page, genre=genre)
+
+
+@blueprint.route('/artists/search', methods=['POST'])
+@read_replica
+@query_budget(1)
+def search_artists():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search for "band" should return "The Wild Sax Band".
+   artist_searched = request.form.get('search_term', '')
+   count, artist_queried = search(Artist, artist_searched, limit=current_app.config['SEARCH_LIMIT'])
+
+   response = {
+    "count": count,
+    "data": artist_queried
+  }
+   return render_template('pages/search_artists.html', results=response, search_term=artist_searched)
+
+
+@blueprint.route('/artists/<int:artist_id>')
+@read_replica
+@query_budget(4)
+@conditional(entity_stamp(Artist, 'artist_id'))
+@cached('artist:{artist_id}')
+def show_artist(artist_id):
+  
+  # shows the artist page with the given artist_id
+  # TODO: replace with real artist data from the artist table, using artist_id
+  # the artist plus its past and upcoming shows, in two queries, split by the
+  # show_stats clock so the lists agree with the counters and the page's stamp
+  queried_artist, past_shows, new_shows = load_detail(Artist, artist_id, now=rolled_at())
+  suggested_venues = suggestions_for(Artist, artist_id, limit=current_app.config['SUGGESTIONS_LIMIT'])
+  add_cache_tags(*['venue:%s' % show['venue_id'] for show in past_shows + new_shows + suggested_venues])
+  if queried_artist is None:
+    return render_template('errors/404.html'), 404
+
+  artist = {
+        "id": queried_artist.id,
+        "name": queried_artist.name,
+        "genres": queried_artist.genres,
+        "city": queried_artist.city,
+        "state": queried_artist.state,
+        "phone": queried_artist.phone,
+        "website": queried_artist.website,
+        "facebook_link": queried_artist.facebook_link,
+        "seeking_venue": queried_artist.seeking_venue,
+        "seeking_description": queried_artist.looking_description,
+        "image_link": queried_artist.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": new_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(new_shows),
+        "suggested_venues": suggested_venues,
+    }
+  return render_template('pages/show_artist.html', artist=artist)
+
+
+#  Update
+#  ----------------------------------------------------------------
+@blueprint.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  form = ArtistForm()
+  queried_artist = Artist.query.filter_by(id=artist_id).first()
+
+  if queried_artist:
+    artist={
+     "id": queried_artist.id,
+      "name": queried_artist.name,
+      "genres": queried_artist.genres,
+      "city": queried_artist.city,
+      "state": queried_artist.state,
+      "phone": queried_artist.phone,
+      "website": queried_artist.website,
+      "facebook_link": queried_artist.facebook_link,
+      "seeking_venue": queried_artist.seeking_venue,
+      "seeking_description": queried_artist.looking_description,
+      "image_link": queried_artist.image_link
+    }
+  # TODO: populate form with fields from artist with ID <artist_id>
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+
+@blueprint.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  # TODO: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+
+  error = False
+  
+  form = ArtistForm()
+  #get the data
+  queried = Artist.query.filter_by(id=artist_id).first()
+  if form.validate():
+
+    try:
+
+      artist = Artist(
+        name= request.form['name'],
+        genres= request.form.getlist('genres'),
+        city = request.form['city'],
+        state= request.form['state'],
+        phone= request.form['phone'],
+        website_link= request.form['website_link'],
+        facebook_link= request.form['facebook_link'],
+        image_link= request.form['image_link'],
+        seeking_venue= request.form['seeking_venue'],
+        seeking_description = request.form['looking_description']
+    ) 
+      
+      db.session.add(artist)
+      db.session.commit()
+      # on successful db insert, flash success
+      flash('Venue ' + artist.name+ ' was successfully listed!')
+      # TODO: on unsuccessful db insert, flash an error instead.
+      # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+      # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+    except:
+      error=True
+      db.session.rollback()
+      # TODO: on unsuccessful db insert, flash an error instead.
+      flash('An error occurred. Artist ' + artist.name + ' could not be listed.')
+      print(sys.exc_info())
+    finally:
+      db.session.close()
+  
+    return render_template('pages/home.html')
+
+  return redirect(url_for('.show_artist', artist_id=artist_id))
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@blueprint.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+
+@blueprint.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  # called upon submitting the new artist listing form
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+
+  error = False
+  #get the data
+  form = ArtistForm(request.form)
+  
+  artist = Artist(
+        name = form.name.data,
+        city = form.city.data,
+        state = form.state.data,
+        phone = form.phone.data,
+        genres = request.form.getlist('genres'),
+        image_link = form.image_link.data,
+        facebook_link = form.facebook_link.data,
+        website  = form.website.data,
+        seeking_venue= form.seeking_venue.data,
+        looking_description = form.looking_description.data,
+        
+  
+      )
+  
+  try:
+    if form.validate():   
+      db.session.add(artist)
+      db.session.commit()
+      # on successful db insert, flash success
+      flash('Artist ' + request.form['name'] + ' was successfully listed!')
+      # TODO: on unsuccessful db insert, flash an error instead.
+    else:
+        for field, message in form.errors.items():
+            flash(field + ' - ' + str(message), 'danger') 
+            return render_template('pages/new_venue.html', form=form)  
+    # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+  except:
+    error=True
+    db.session.rollback()
+    flash('An error occurred. Venue ' + artist.name + ' could not be listed.')
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  
+  return render_template('pages/home.html', form=form)
@@ -0,0 +1,156 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from models import db, Venue, Artist
+
+#----------------------------------------------------------------------------#
+# Name autocomplete.
+#----------------------------------------------------------------------------#
+
+# Venue and artist names are kept in memory as a sorted list of lowercased
+# word suffixes ("the musical hop", "musical hop", "hop"), so a prefix
+# lookup is a bisect plus a short forward scan and never touches the
+# database. The index is built lazily on first use, kept current by the
+# ORM events below, and rebuilt after `max_age` seconds to pick up writes
+# made by other worker processes. One thread rebuilds at a time; the
+# others keep searching the old index until the new one is swapped in.
+
+KINDS = {Venue: 'venue', Artist: 'artist'}
+
+
+def _suffixes(name):
+    lowered = name.lower()
+    starts = [0] + [i + 1 for i, c in enumerate(lowered) if c == ' ' and i + 1 < len(lowered)]
+    return [lowered[i:] for i in starts if lowered[i] != ' ']
+
+
+class PrefixIndex:
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._keys = []
+        self._entries = {}
+        self._built_at = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    # searches read self._keys without the lock, so writers never change the
+    # list in place: they edit a copy and swap the reference
+
+    def add(self, kind, entity_id, name):
+        with self._lock:
+            keys = list(self._keys)
+            self._remove(keys, (kind, entity_id))
+            entry = [(suffix, kind, entity_id, name) for suffix in _suffixes(name)]
+            for key in entry:
+                insort(keys, key)
+            self._entries[(kind, entity_id)] = entry
+            self._keys = keys
+
+    def remove(self, kind, entity_id):
+        with self._lock:
+            keys = list(self._keys)
+            self._remove(keys, (kind, entity_id))
+            self._keys = keys
+
+    def _remove(self, keys, entry):
+        for key in self._entries.pop(entry, []):
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+    def invalidate(self):
+        # stale, but an index already built goes on serving until it is rebuilt
+        if self._built_at is not None:
+            self._built_at = float('-inf')
+
+    def _stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > self.max_age
+
+    def build(self):
+        keys = []
+        entries = {}
+        for model, kind in KINDS.items():
+            for entity_id, name in db.session.query(model.id, model.name):
+                entries[(kind, entity_id)] = [(suffix, kind, entity_id, name) for suffix in _suffixes(name)]
+                keys.extend(entries[(kind, entity_id)])
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._entries = entries
+            self._built_at = time.monotonic()
+
+    def search(self, prefix, kind=None, limit=10):
+        if self._stale():
+            # only the first search waits for a build; later ones use the old index
+            if self._build_lock.acquire(blocking=self._built_at is None):
+                try:
+                    if self._stale():
+                        self.build()
+                finally:
+                    self._build_lock.release()
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        keys = self._keys
+        i = bisect_left(keys, (prefix,))
+        while i < len(keys) and keys[i][0].startswith(prefix) and len(results) < limit:
+            _, key_kind, entity_id, name = keys[i]
+            if (kind is None or key_kind == kind) and (key_kind, entity_id) not in seen:
+                seen.add((key_kind, entity_id))
+                results.append({'type': key_kind, 'id': entity_id, 'name': name})
+            i += 1
+        return results
+
+
+name_index = PrefixIndex()
+
+
+#  Index maintenance
+#  ----------------------------------------------------------------
+
+# mapper events fire during flush, so changes are staged on the session
+# and only applied to the index once the transaction commits
+
+def _stage(session, change):
+    session.info.setdefault('autocomplete_changes', []).append(change)
+
+
+def _after_save(mapper, connection, target):
+    _stage(object_session(target), ('add', KINDS[mapper.class_], target.id, target.name))
+
+
+def _after_delete(mapper, connection, target):
+    _stage(object_session(target), ('remove', KINDS[mapper.class_], target.id, None))
+
+
+def _after_commit(session):
+    for action, kind, entity_id, name in session.info.pop('autocomplete_changes', []):
+        if action == 'add':
+            name_index.add(kind, entity_id, name)
+        elif action == 'remove':
+            name_index.remove(kind, entity_id)
+        else:
+            name_index.invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop('autocomplete_changes', None)
+
+
+def _after_bulk_delete(delete_context):
+    # Query.delete() does not say which rows went away, so rebuild
+    if getattr(delete_context.mapper, 'class_', None) in KINDS:
+        _stage(delete_context.session, ('invalidate', None, None, None))
+
+
+for model in KINDS:
+    event.listen(model, 'after_insert', _after_save)
+    event.listen(model, 'after_update', _after_save)
+    event.listen(model, 'after_delete', _after_delete)
+event.listen(db.session, 'after_commit', _after_commit)
+event.listen(db.session, 'after_rollback', _after_rollback)
+event.listen(db.session, 'after_bulk_delete', _after_bulk_delete)
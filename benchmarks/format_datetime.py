@@ -0,0 +1,54 @@
+"""Per-call cost of the `datetime` template filter.
+
+Compares the previous implementation (str() -> dateutil parse -> babel
+format_datetime) with app.format_datetime over 100k show start times.
+
+    python benchmarks/format_datetime.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import babel.dates
+import dateutil.parser
+from app import format_datetime, _format_datetime
+
+ROWS = 100000
+
+
+def old_format_datetime(value, format='medium'):
+  date = dateutil.parser.parse(value)
+  if format == 'full':
+      format="EEEE MMMM, d, y 'at' h:mma"
+  elif format == 'medium':
+      format="EE MM, dd, y h:mma"
+  return babel.dates.format_datetime(date, format, locale='en')
+
+
+def run(label, fn, values):
+  start = time.perf_counter()
+  for value in values:
+    fn(value, 'full')
+  elapsed = time.perf_counter() - start
+  print('%-34s %8.2f us/call  %6.2f s total' % (label, elapsed / len(values) * 1e6, elapsed))
+
+
+def main():
+  base = datetime(2026, 1, 1, 20, 0)
+  # shows cluster on a limited set of start times, so repeats are common
+  repeated = [base + timedelta(hours=i % 2000) for i in range(ROWS)]
+  distinct = [base + timedelta(minutes=i) for i in range(ROWS)]
+
+  run('before (repeated times)', lambda v, f: old_format_datetime(str(v), f), repeated)
+  _format_datetime.cache_clear()
+  run('after (repeated times)', format_datetime, repeated)
+  run('before (distinct times)', lambda v, f: old_format_datetime(str(v), f), distinct)
+  _format_datetime.cache_clear()
+  run('after (distinct times)', format_datetime, distinct)
+
+
+if __name__ == '__main__':
+  main()
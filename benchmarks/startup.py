@@ -0,0 +1,82 @@
+"""Worker boot cost: import time and time to first request.
+
+Each run starts a fresh interpreter, as a new or recycled gunicorn worker
+would. `python -X importtime -c "import app"` gives the total import time
+and the heaviest top-level imports; a second child times create_app() and
+the first request through the test client. Set DATABASE_URL and
+FYYUR_CONFIG as for the server (the default path does not query).
+
+    FYYUR_CONFIG=development python benchmarks/startup.py [path]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+TOP = 12
+
+FIRST_REQUEST = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+status = app.test_client().get(sys.argv[1]).status_code
+done = time.perf_counter()
+print(json.dumps({'status': status, 'import': imported - started,
+                  'create_app': created - imported, 'first_request': done - created}))
+'''
+
+
+def import_times():
+  # lines look like "import time:   self [us] | cumulative | <indent>package"
+  stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT,
+                          capture_output=True, text=True, check=True).stderr
+  total, children = 0, {}
+  for line in stderr.splitlines():
+    parts = line.split('|')
+    if len(parts) != 3 or not parts[1].strip().isdigit():
+      continue
+    name = parts[2]
+    depth = (len(name) - len(name.lstrip())) // 2
+    if depth == 0 and name.strip() == 'app':
+      total = int(parts[1])
+    elif depth == 1:
+      children[name.strip()] = int(parts[1])
+  return total, children
+
+
+def first_request(path):
+  out = subprocess.run([sys.executable, '-c', FIRST_REQUEST, path], cwd=ROOT,
+                       capture_output=True, text=True, check=True).stdout
+  return json.loads(out.splitlines()[-1])
+
+
+def main():
+  path = sys.argv[1] if len(sys.argv) > 1 else '/'
+  totals, children = [], {}
+  for _ in range(RUNS):
+    total, run_children = import_times()
+    totals.append(total)
+    for name, us in run_children.items():
+      children.setdefault(name, []).append(us)
+  print('import app (-X importtime)      %8.1f ms  median of %d' % (statistics.median(totals) / 1000, RUNS))
+  heaviest = sorted(children.items(), key=lambda item: statistics.median(item[1]), reverse=True)[:TOP]
+  for name, values in heaviest:
+    print('  %-30s %8.1f ms' % (name, statistics.median(values) / 1000))
+
+  runs = [first_request(path) for _ in range(RUNS)]
+  print('GET %s -> %s' % (path, runs[0]['status']))
+  for key in ('import', 'create_app', 'first_request'):
+    print('  %-30s %8.1f ms' % (key, statistics.median(run[key] for run in runs) * 1000))
+  print('  %-30s %8.1f ms' % ('time to first request',
+                              statistics.median(sum(run[key] for key in ('import', 'create_app', 'first_request'))
+                                                for run in runs) * 1000))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, g, make_response, request, session
+from sqlalchemy import event, inspect
+from models import db, Venue, Artist, Show
+from metrics import metrics
+
+#----------------------------------------------------------------------------#
+# Response cache.
+#----------------------------------------------------------------------------#
+
+# Rendered GET responses are stored under their full path and tagged with
+# the entities they display ("venue:3", "artist:7") plus the list they
+# belong to ("list:venues"). Committed writes to Venue, Artist or Show
+# drop only the tags they touch.
+
+
+class LRUBackend:
+    """In-process LRU with a per-entry TTL. Each worker keeps its own copy."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisBackend:
+    """Shared cache for multi-worker deployments.
+
+    ``client`` only needs the get/setex/delete/sadd/expire/smembers/scan_iter
+    subset of the redis-py API, so an in-memory stand-in works for local runs.
+    """
+
+    def __init__(self, client, ttl=60, prefix='fyyur:cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, tags=()):
+        self.client.setex(self.prefix + key, self.ttl, value)
+        for tag in tags:
+            self.client.sadd(self.prefix + 'tag:' + tag, self.prefix + key)
+            self.client.expire(self.prefix + 'tag:' + tag, self.ttl)
+
+    def invalidate(self, tags):
+        for tag in tags:
+            tag_key = self.prefix + 'tag:' + tag
+            keys = list(self.client.smembers(tag_key))
+            self.client.delete(tag_key, *keys)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    def __init__(self):
+        self.backend = None
+        # bumped by every invalidation in this process, see cached()
+        self.epoch = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        kind = app.config.get('CACHE_BACKEND', 'lru')
+        if kind == 'redis':
+            import redis
+            client = redis.Redis.from_url(app.config['CACHE_REDIS_URL'])
+            self.backend = RedisBackend(client, ttl=app.config['CACHE_TTL'])
+        elif kind == 'lru':
+            self.backend = LRUBackend(maxsize=app.config['CACHE_MAXSIZE'], ttl=app.config['CACHE_TTL'])
+        else:
+            self.backend = None
+
+    def invalidate(self, tags):
+        if self.backend is not None and tags:
+            with self._lock:
+                self.epoch += 1
+            self.backend.invalidate(tags)
+
+    def clear(self):
+        if self.backend is not None:
+            with self._lock:
+                self.epoch += 1
+            self.backend.clear()
+
+
+response_cache = ResponseCache()
+
+
+def add_cache_tags(*tags):
+    """Tag the response being rendered with extra entities it displays."""
+    g.setdefault('cache_tags', set()).update(tags)
+
+
+def cached(*tags):
+    """Cache a GET view's response body under the request path.
+
+    ``tags`` may reference the view arguments, e.g. ``'venue:{venue_id}'``.
+    Under ``conditional`` the key includes the page's version stamp, and a
+    page without one is rendered but not stored.
+    Requests with pending flashed messages bypass the cache so a message is
+    never stored in, or hidden by, a cached page.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            backend = response_cache.backend
+            if backend is None or request.method != 'GET' or '_flashes' in session:
+                return view(**kwargs)
+
+            # responses under a version stamp (see conditional.py) are only
+            # reused while the stamp is unchanged. a page whose stamp is
+            # missing (an unknown id) is not stored: a later insert by another
+            # worker or `flask import` could not replace it
+            version = g.get('cache_version', '')
+            if version is None:
+                return view(**kwargs)
+            key = '%s|%s' % (version, request.full_path)
+            epoch = response_cache.epoch
+            hit = backend.get(key)
+            metrics.cache_lookup('response', hit is not None)
+            if hit is not None:
+                response = Response(hit, content_type='text/html; charset=utf-8')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(view(**kwargs))
+            # the data behind this render may predate a change committed by
+            # another request while it ran; that commit's invalidation has
+            # already happened, so storing now would bring the old page back
+            if (response.status_code == 200 and '_flashes' not in session
+                    and epoch == response_cache.epoch):
+                all_tags = {tag.format(**kwargs) for tag in tags} | g.pop('cache_tags', set())
+                backend.set(key, response.get_data(), tuple(all_tags))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+#  Invalidation
+#  ----------------------------------------------------------------
+
+def _history_values(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    return set(history.unchanged or ()) | set(history.added or ()) | set(history.deleted or ())
+
+
+def tags_for(obj):
+    """Cache tags made stale by a change to ``obj``."""
+    if isinstance(obj, Venue):
+        return {'venue:%s' % obj.id, 'list:venues', 'list:shows'}
+    if isinstance(obj, Artist):
+        return {'artist:%s' % obj.id, 'list:artists', 'list:shows'}
+    if isinstance(obj, Show):
+        tags = {'list:venues', 'list:artists', 'list:shows'}
+        tags.update('venue:%s' % venue_id for venue_id in _history_values(obj, 'venue_id'))
+        tags.update('artist:%s' % artist_id for artist_id in _history_values(obj, 'artist_id'))
+        return tags
+    return set()
+
+
+def _after_flush(session, flush_context):
+    stale = session.info.setdefault('cache_stale_tags', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        stale.update(tags_for(obj))
+
+
+def _after_bulk_delete(delete_context):
+    # Query.delete() does not say which rows went away, so drop everything
+    session = delete_context.session
+    session.info['cache_clear'] = True
+
+
+def _after_commit(session):
+    if session.info.pop('cache_clear', False):
+        response_cache.clear()
+    response_cache.invalidate(session.info.pop('cache_stale_tags', set()))
+
+
+def _after_rollback(session):
+    session.info.pop('cache_stale_tags', None)
+    session.info.pop('cache_clear', None)
+
+
+event.listen(db.session, 'after_flush', _after_flush)
+event.listen(db.session, 'after_bulk_delete', _after_bulk_delete)
+event.listen(db.session, 'after_commit', _after_commit)
+event.listen(db.session, 'after_rollback', _after_rollback)
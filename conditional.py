@@ -0,0 +1,98 @@
+import hashlib
+from functools import wraps
+from flask import current_app, g, make_response, request, session
+from werkzeug.http import is_resource_modified
+from models import db, Venue, Artist, CatalogVersion, UTC_NOW
+
+#----------------------------------------------------------------------------#
+# Conditional GET.
+#----------------------------------------------------------------------------#
+
+# Catalog pages are validated against version stamps kept by triggers (see
+# the add_version_stamps migration) before the view runs: a detail page by
+# its venue's or artist's updated_at, which moves whenever anything shown
+# on it changes, and a list page by the single CatalogVersion row, bumped
+# by every write to the catalog. A client sending a matching If-None-Match
+# or If-Modified-Since gets a 304 for the price of one primary-key lookup.
+# The version also goes into the response cache key (see cache.cached), so
+# a write made by another worker or a CLI command, which cannot reach this
+# worker's cache, still stops the old body from being served.
+#
+# Detail pages split upcoming/past by the show_stats clock (the views pass
+# show_stats.rolled_at() to load_detail), not by the time of the request:
+# the roll updates the counters, which moves the stamps, so a show that
+# starts moves over on the page after the next `flask show-stats roll`.
+
+
+def catalog_stamp(**kwargs):
+    row = db.session.query(CatalogVersion.version, CatalogVersion.updated_at) \
+        .filter(CatalogVersion.id == 1) \
+        .first()
+    if row is None:
+        return None
+    return 'catalog:%s' % row.version, row.updated_at
+
+
+def entity_stamp(model, arg):
+    """Stamp of the venue or artist named by the view argument ``arg``."""
+    def stamp(**kwargs):
+        updated_at = db.session.query(model.updated_at).filter(model.id == kwargs[arg]).scalar()
+        if updated_at is None:
+            return None
+        return '%s:%s:%s' % (model.__tablename__, kwargs[arg], updated_at.isoformat()), updated_at
+    return stamp
+
+
+def bump_catalog_version():
+    """Invalidate every list page, for changes the triggers do not see."""
+    db.session.query(CatalogVersion).filter(CatalogVersion.id == 1).update({
+        CatalogVersion.version: CatalogVersion.version + 1,
+        CatalogVersion.updated_at: UTC_NOW,
+    }, synchronize_session=False)
+
+
+def touch_all():
+    """Move every venue and artist stamp forward (and with it the catalog version)."""
+    for model in (Venue, Artist):
+        db.session.query(model).update({model.updated_at: model.updated_at}, synchronize_session=False)
+
+
+def _etag(version):
+    raw = '%s|%s' % (current_app.config['ETAG_SALT'], version)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def conditional(stamp):
+    """Answer a GET view with 304 when the client's copy is still current.
+
+    ``stamp(**view_args)`` returns ``(version, last_modified)``, or None to
+    skip validation (e.g. the entity does not exist and the view will 404).
+    Requests with pending flashed messages always render, like ``cached``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if request.method != 'GET' or '_flashes' in session:
+                return view(**kwargs)
+            validator = stamp(**kwargs)
+            if validator is None:
+                # nothing to key a cached copy on either, see cache.cached
+                g.cache_version = None
+                return view(**kwargs)
+
+            version, last_modified = validator
+            g.cache_version = version
+            etag = _etag(version)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200 or '_flashes' in session:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            # let browsers keep the page but check back every time
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
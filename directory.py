@@ -0,0 +1,32 @@
+import click
+from flask.cli import with_appcontext
+from models import db
+from cache import response_cache
+from conditional import bump_catalog_version
+
+#----------------------------------------------------------------------------#
+# Venue directory view.
+#----------------------------------------------------------------------------#
+
+# VenueDirectory is a materialized view of every venue with its upcoming
+# show count. With VENUES_FROM_DIRECTORY_VIEW on, /venues reads it with a
+# single index-ordered scan; it is only as fresh as its last refresh.
+
+
+def refresh_directory():
+    # CONCURRENTLY keeps the view readable while it is rebuilt
+    db.session.execute('REFRESH MATERIALIZED VIEW CONCURRENTLY "VenueDirectory"')
+    bump_catalog_version()
+    db.session.commit()
+    # the version bump is what reaches the web workers: /venues is cached
+    # under it (see conditional.py). This only frees entries in a shared
+    # (redis) cache; a CLI process has no view of the workers' lru caches
+    response_cache.invalidate({'list:venues'})
+
+
+@click.command('refresh-directory')
+@with_appcontext
+def refresh_directory_command():
+    """Rebuild the VenueDirectory materialized view."""
+    refresh_directory()
+    click.echo('Venue directory refreshed.')
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from models import db, Venue, Artist, Show, Genre, VenueGenre, ArtistGenre
+
+#----------------------------------------------------------------------------#
+# Streaming export.
+#----------------------------------------------------------------------------#
+
+# Exports select plain columns through a server-side cursor (yield_per), so
+# rows are fetched from PostgreSQL in blocks and written out as they arrive;
+# no ORM objects are built and memory stays flat however large the table.
+# The column names match what `flask import` reads back.
+
+# the format `flask import` parses start_time with
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def _genres(junction_fk, entity_id):
+    return db.session.query(func.array_agg(Genre.name)) \
+        .join(junction_fk.table, junction_fk.table.c.genre_id == Genre.id) \
+        .filter(junction_fk == entity_id) \
+        .scalar_subquery() \
+        .label('genres')
+
+
+def _venues():
+    return db.session.query(
+        Venue.id, Venue.name, Venue.city, Venue.state, Venue.address, Venue.phone,
+        Venue.image_link, Venue.facebook_link, Venue.website_link,
+        Venue.looking_talent, Venue.seeking_description,
+        _genres(VenueGenre.c.venue_id, Venue.id)
+    ).order_by(Venue.id)
+
+
+def _artists():
+    return db.session.query(
+        Artist.id, Artist.name, Artist.city, Artist.state, Artist.phone,
+        Artist.image_link, Artist.facebook_link, Artist.website,
+        Artist.seeking_venue, Artist.looking_description,
+        _genres(ArtistGenre.c.artist_id, Artist.id)
+    ).order_by(Artist.id)
+
+
+def _shows():
+    return db.session.query(Show.id, Show.artist_id, Show.venue_id, Show.start_time).order_by(Show.id)
+
+
+EXPORTS = {
+    'venues': _venues,
+    'artists': _artists,
+    'shows': _shows,
+}
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ','.join(value)
+    return _json_value(value)
+
+
+def _json_value(value):
+    return value.strftime(DATETIME_FORMAT) if isinstance(value, datetime) else value
+
+
+def export_chunks(kind, fmt, chunk_size=1000):
+    """Yield the export as text chunks of roughly ``chunk_size`` rows."""
+    query = EXPORTS[kind]()
+    names = [column['name'] for column in query.column_descriptions]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(names)
+
+    rows = 0
+    for row in query.yield_per(chunk_size):
+        if fmt == 'csv':
+            writer.writerow([_csv_value(value) for value in row])
+        else:
+            buffer.write(json.dumps({name: _json_value(value) for name, value in zip(names, row)}))
+            buffer.write('\n')
+        rows += 1
+        if rows % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@click.command('export')
+@click.argument('kind', type=click.Choice(sorted(EXPORTS)))
+@click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='csv', show_default=True)
+@click.option('-o', '--output', type=click.File('w', encoding='utf-8'), default='-', help='Defaults to stdout.')
+@with_appcontext
+def export_command(kind, fmt, output):
+    """Stream venues, artists or shows to a CSV or JSONL file."""
+    for chunk in export_chunks(kind, fmt):
+        output.write(chunk)
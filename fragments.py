@@ -0,0 +1,60 @@
+import json
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from cache import LRUBackend
+from metrics import metrics
+
+#----------------------------------------------------------------------------#
+# Template fragment cache.
+#----------------------------------------------------------------------------#
+
+# {% cache name, value, ... %}...{% endcache %} renders its body once and
+# reuses the HTML wherever the same name and values come up again, on any
+# page. The values are everything the fragment displays (for a show tile:
+# the show id, start time and the counterpart's id, name and image), all of
+# which the view has just read, so an edit anywhere — another worker, a CLI
+# command — changes the key and the next render misses. Nothing has to be
+# invalidated; old entries age out of the bounded store.
+
+
+class FragmentCache:
+    def __init__(self):
+        self.store = None
+
+    def init_app(self, app):
+        if app.config.get('CACHE_BACKEND', 'lru') != 'none':
+            self.store = LRUBackend(maxsize=app.config['FRAGMENT_CACHE_MAXSIZE'],
+                                    ttl=app.config['FRAGMENT_CACHE_TTL'])
+        app.jinja_env.add_extension(FragmentCacheExtension)
+
+    def fetch(self, name, values, render):
+        """Return the cached HTML for ``name`` and ``values`` or ``render()`` and keep it."""
+        if self.store is None:
+            return render()
+        key = json.dumps([name] + list(values), default=str)
+        html = self.store.get(key)
+        metrics.cache_lookup('fragment', html is not None)
+        if html is None:
+            html = render()
+            self.store.set(key, html)
+        return html
+
+
+fragment_cache = FragmentCache()
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(args)]), [], [], body) \
+            .set_lineno(lineno)
+
+    def _render(self, args, caller):
+        return Markup(fragment_cache.fetch(str(args[0]), args[1:], lambda: str(caller())))
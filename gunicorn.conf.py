@@ -0,0 +1,21 @@
+import glob
+import os
+
+#----------------------------------------------------------------------------#
+# Gunicorn hooks for multiprocess /metrics (see metrics.py).
+#----------------------------------------------------------------------------#
+
+
+def on_starting(server):
+    # samples left by a previous run would be added to this one's
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,276 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, text
+from wtforms import BooleanField, DateTimeField, SelectField, SelectMultipleField
+from wtforms.fields.core import UnboundField
+from wtforms.validators import StopValidation, ValidationError
+from forms import VenueForm, ArtistForm, ShowForm
+from models import db, Venue, Artist, Show, Genre, VenueGenre, ArtistGenre
+from cache import response_cache
+from autocomplete import name_index
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#----------------------------------------------------------------------------#
+
+# `flask import venues venues.csv` streams a CSV or JSONL file, checks each
+# row against the validators declared on the matching form, and loads the
+# valid rows in batches with COPY (executemany on other databases). Each
+# form's fields are compiled into plain checks once, so no WTForms form is
+# built per row. Multi-valued genres are a list in JSONL and a
+# comma-separated cell in CSV; booleans accept true/false, yes/no or 1/0.
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'on'}
+
+
+class _Field:
+    """Just enough of a bound field for the WTForms validators to run."""
+
+    def __init__(self, name):
+        self.name = name
+        self.data = None
+        self.raw_data = None
+        self.errors = []
+
+    def gettext(self, string):
+        return string
+
+    def ngettext(self, singular, plural, n):
+        return singular if n == 1 else plural
+
+
+class _Check:
+    def __init__(self, name, unbound):
+        self.name = name
+        self.field_class = unbound.field_class
+        self.validators = unbound.kwargs.get('validators') or []
+        self.choices = {value for value, _ in unbound.kwargs.get('choices') or []}
+        self.format = unbound.kwargs.get('format', '%Y-%m-%d %H:%M:%S')
+        self.field = _Field(name)
+
+    def coerce(self, value):
+        if issubclass(self.field_class, BooleanField):
+            return str(value).strip().lower() in TRUE_VALUES if value not in (None, '') else False
+        if issubclass(self.field_class, SelectMultipleField):
+            if isinstance(value, str):
+                value = [part.strip() for part in value.split(',') if part.strip()]
+            if not isinstance(value, (list, tuple, type(None))):
+                raise ValidationError('Not a valid list.')
+            return [str(item) for item in value or []]
+        if issubclass(self.field_class, DateTimeField):
+            if isinstance(value, datetime) or value in (None, ''):
+                return value or None
+            try:
+                return datetime.strptime(str(value).strip(), self.format)
+            except ValueError:
+                raise ValidationError('Not a valid datetime value.')
+        # form fields only ever see strings; JSONL can carry numbers
+        if isinstance(value, (dict, list)):
+            raise ValidationError('Not a valid string.')
+        return value if value is None or isinstance(value, str) else str(value)
+
+    def __call__(self, value):
+        value = self.coerce(value)
+        field = self.field
+        field.data = value
+        field.raw_data = [value]
+        field.errors = []
+        for validator in self.validators:
+            try:
+                validator(None, field)
+            except StopValidation as e:
+                if e.args and e.args[0]:
+                    raise ValidationError(e.args[0])
+                break
+        if self.choices and value:
+            values = value if isinstance(value, list) else [value]
+            if issubclass(self.field_class, SelectField) and not set(values) <= self.choices:
+                raise ValidationError('Not a valid choice.')
+        return value
+
+
+def compile_form(form_class):
+    """Turn a form's declared fields into ``{name: check}`` callables."""
+    checks = {}
+    for name in dir(form_class):
+        unbound = getattr(form_class, name)
+        if isinstance(unbound, UnboundField):
+            checks[name] = _Check(name, unbound)
+    return checks
+
+
+class Loader:
+    def __init__(self, form_class, model, junction=None):
+        self.checks = compile_form(form_class)
+        self.model = model
+        self.table = model.__table__
+        self.junction = junction
+        self.columns = [name for name in self.checks if name in self.table.c]
+        # most form fields carry no Length validator, but COPY fails the whole
+        # batch on one value longer than its String(n) column
+        self.max_lengths = {name: self.table.c[name].type.length for name in self.columns
+                            if getattr(self.table.c[name].type, 'length', None)}
+
+    def validate(self, row):
+        values = {}
+        errors = []
+        for name, check in self.checks.items():
+            try:
+                values[name] = check(row.get(name))
+                max_length = self.max_lengths.get(name)
+                if max_length and isinstance(values[name], str) and len(values[name]) > max_length:
+                    raise ValidationError('Field cannot be longer than %d characters.' % max_length)
+            except ValidationError as e:
+                errors.append('%s - %s' % (name, e))
+            except Exception as e:
+                # a value no validator expected rejects the row, not the import
+                errors.append('%s - %s: %s' % (name, type(e).__name__, e))
+        return values, errors
+
+    def reserve_ids(self, n):
+        if db.engine.dialect.name == 'postgresql':
+            sequence = '"%s_id_seq"' % self.table.name
+            return [row[0] for row in db.session.execute(
+                text('SELECT nextval(:sequence) FROM generate_series(1, :n)'), {'sequence': sequence, 'n': n})]
+        # local databases without sequences: the importer is the only writer
+        start = (db.session.query(func.max(self.model.id)).scalar() or 0) + 1
+        return list(range(start, start + n))
+
+    def load(self, batch):
+        """Insert one batch of validated rows; returns the positions it rejected."""
+        if self.junction is not None:
+            genre_ids = dict(db.session.query(Genre.name, Genre.id))
+            ids = self.reserve_ids(len(batch))
+            rows = [dict({column: values[column] for column in self.columns}, id=entity_id)
+                    for entity_id, values in zip(ids, batch)]
+            entity_fk, = [c for c in self.junction.c if c.name != 'genre_id']
+            links = [{entity_fk.name: row['id'], 'genre_id': genre_ids[genre]}
+                     for row, values in zip(rows, batch)
+                     for genre in dict.fromkeys(values.get('genres', [])) if genre in genre_ids]
+            _insert(self.table, rows)
+            _insert(self.junction, links)
+            return []
+
+        # shows: reject rows pointing at venues or artists that do not exist
+        rejected = []
+        venue_ids = {values['venue_id'] for values in batch}
+        artist_ids = {values['artist_id'] for values in batch}
+        known_venues = {row[0] for row in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids))}
+        known_artists = {row[0] for row in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids))}
+        rows = []
+        for position, values in enumerate(batch):
+            if values['venue_id'] in known_venues and values['artist_id'] in known_artists:
+                rows.append({column: values[column] for column in self.columns})
+            else:
+                rejected.append(position)
+        _insert(self.table, rows)
+        return rejected
+
+
+def _insert(table, rows):
+    if not rows:
+        return
+    if db.engine.dialect.name != 'postgresql':
+        db.session.execute(table.insert(), rows)
+        return
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert('COPY "%s" (%s) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')'
+                       % (table.name, ', '.join('"%s"' % column for column in columns)), buffer)
+
+
+def _read(path, fmt):
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'jsonl':
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError:
+                        yield line_number, None
+        else:
+            for line_number, row in enumerate(csv.DictReader(f), 2):
+                yield line_number, row
+
+
+LOADERS = {
+    'venues': lambda: Loader(VenueForm, Venue, VenueGenre),
+    'artists': lambda: Loader(ArtistForm, Artist, ArtistGenre),
+    'shows': lambda: Loader(ShowForm, Show),
+}
+
+
+def import_file(kind, path, fmt=None, batch_size=1000, max_errors=20, echo=click.echo):
+    """Stream ``path`` into the ``kind`` table; returns (loaded, rejected, seconds)."""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+    loader = LOADERS[kind]()
+    loaded = rejected = 0
+    batch = []
+    started = time.perf_counter()
+
+    def report(line_number, errors):
+        if rejected <= max_errors:
+            echo('line %s: %s' % (line_number, '; '.join(errors)), err=True)
+
+    def flush():
+        nonlocal loaded, rejected
+        dropped = loader.load([values for _, values in batch])
+        db.session.commit()
+        loaded += len(batch) - len(dropped)
+        for position in dropped:
+            rejected += 1
+            report(batch[position][0], ['venue_id/artist_id - no such venue or artist'])
+        batch.clear()
+
+    for line_number, row in _read(path, fmt):
+        if not isinstance(row, dict):
+            rejected += 1
+            report(line_number, ['not a JSON object'])
+            continue
+        values, errors = loader.validate(row)
+        if kind == 'shows' and not errors:
+            try:
+                values['venue_id'] = int(values['venue_id'])
+                values['artist_id'] = int(values['artist_id'])
+            except (TypeError, ValueError):
+                errors.append('venue_id/artist_id - not an integer')
+        if errors:
+            rejected += 1
+            report(line_number, errors)
+            continue
+        batch.append((line_number, values))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    # COPY bypasses the ORM events that keep these current. Cached pages in
+    # the web workers are keyed on version stamps the inserts have moved; from
+    # the CLI these calls only reach a shared (redis) cache and this process's
+    # autocomplete index. Workers pick up new names after AUTOCOMPLETE_MAX_AGE
+    response_cache.clear()
+    name_index.invalidate()
+    return loaded, rejected, time.perf_counter() - started
+
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(sorted(LOADERS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows per COPY and commit.')
+@with_appcontext
+def import_command(kind, path, fmt, batch_size):
+    """Bulk load venues, artists or shows from a CSV or JSONL file."""
+    loaded, rejected, seconds = import_file(kind, path, fmt=fmt, batch_size=batch_size)
+    click.echo('Loaded %d %s, rejected %d, in %.1fs (%.0f rows/s).'
+               % (loaded, kind, rejected, seconds, (loaded + rejected) / seconds if seconds else 0))
@@ -0,0 +1,150 @@
+import time
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func
+from models import db, Venue, Artist, Show, Match, VenueGenre, ArtistGenre
+from cache import response_cache
+from conditional import touch_all
+
+#----------------------------------------------------------------------------#
+# Artist-venue matchmaking.
+#----------------------------------------------------------------------------#
+
+# A batch job scores every artist against every venue and keeps the top K
+# for each side in the Match table; the detail pages only read that table.
+# A pair scores higher the more their genres overlap (cosine similarity of
+# genre vectors), when they are in the same state or city, and when the
+# artist has already played the venue. Only venues looking for talent are
+# suggested to artists and only artists seeking venues to venues.
+
+GENRE_WEIGHT = 0.6
+SAME_STATE_WEIGHT = 0.1
+SAME_CITY_WEIGHT = 0.2
+BOOKED_WEIGHT = 0.1
+BOOKED_CAP = 3
+
+
+class _Side:
+    """Column arrays for every venue or every artist, in id order."""
+
+    def __init__(self, np, model, seeking, junction_fk, places, states, n_genres):
+        rows = db.session.query(model.id, model.city, model.state, seeking).order_by(model.id).all()
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.position = {entity_id: i for i, entity_id in enumerate(self.ids.tolist())}
+        self.state = np.array([states.setdefault(row[2].strip().upper(), len(states)) for row in rows],
+                              dtype=np.int32)
+        self.place = np.array([places.setdefault((row[1].strip().lower(), row[2].strip().upper()), len(places))
+                               for row in rows], dtype=np.int32)
+        self.seeking = np.array([bool(row[3]) for row in rows], dtype=bool)
+
+        self.genres = np.zeros((len(rows), n_genres), dtype=np.float32)
+        pairs = [(self.position[entity_id], genre_id)
+                 for entity_id, genre_id in db.session.query(junction_fk, junction_fk.table.c.genre_id)
+                 if entity_id in self.position]
+        if pairs:
+            rows_idx, genre_idx = np.array(pairs).T
+            self.genres[rows_idx, genre_idx] = 1
+        norms = np.linalg.norm(self.genres, axis=1, keepdims=True)
+        np.divide(self.genres, norms, out=self.genres, where=norms > 0)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _top_k(np, rows, cols, booked, k, chunk):
+    """Yield ``(row id, col id, score)`` for each row's best ``k`` columns."""
+    if not len(rows) or not len(cols):
+        return
+    k = min(k, len(cols))
+    booked_rows, booked_cols, booked_weight = booked
+    for start in range(0, len(rows), chunk):
+        stop = min(start + chunk, len(rows))
+        score = GENRE_WEIGHT * (rows.genres[start:stop] @ cols.genres.T)
+        score += SAME_STATE_WEIGHT * (rows.state[start:stop, None] == cols.state[None, :])
+        score += SAME_CITY_WEIGHT * (rows.place[start:stop, None] == cols.place[None, :])
+        in_chunk = (booked_rows >= start) & (booked_rows < stop)
+        np.add.at(score, (booked_rows[in_chunk] - start, booked_cols[in_chunk]), booked_weight[in_chunk])
+        score[:, ~cols.seeking] = 0
+
+        top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(score, top, axis=1)
+        row_idx, col_pos = np.nonzero(top_scores > 0)
+        for i, j, value in zip(row_idx.tolist(), top[row_idx, col_pos].tolist(),
+                               top_scores[row_idx, col_pos].tolist()):
+            yield int(rows.ids[start + i]), int(cols.ids[j]), value
+
+
+def rebuild_matches(top_k=10, chunk=1024, batch_size=5000):
+    """Recompute the Match table; returns the number of pairs stored."""
+    import numpy as np
+
+    n_genres = (db.session.query(func.max(VenueGenre.c.genre_id)).scalar() or 0)
+    n_genres = max(n_genres, db.session.query(func.max(ArtistGenre.c.genre_id)).scalar() or 0) + 1
+    places = {}
+    states = {}
+    venues = _Side(np, Venue, Venue.looking_talent, VenueGenre.c.venue_id, places, states, n_genres)
+    artists = _Side(np, Artist, Artist.seeking_venue, ArtistGenre.c.artist_id, places, states, n_genres)
+
+    booked = [(venues.position[venue_id], artists.position[artist_id], count)
+              for venue_id, artist_id, count in db.session.query(Show.venue_id, Show.artist_id, func.count(Show.id))
+              .group_by(Show.venue_id, Show.artist_id)
+              if venue_id in venues.position and artist_id in artists.position]
+    booked = np.array(booked, dtype=np.int64).reshape(-1, 3)
+    weight = BOOKED_WEIGHT * np.minimum(booked[:, 2], BOOKED_CAP) / BOOKED_CAP
+
+    pairs = {}
+    for venue_id, artist_id, score in _top_k(np, venues, artists, (booked[:, 0], booked[:, 1], weight), top_k, chunk):
+        pairs[(venue_id, artist_id)] = score
+    for artist_id, venue_id, score in _top_k(np, artists, venues, (booked[:, 1], booked[:, 0], weight), top_k, chunk):
+        pairs[(venue_id, artist_id)] = score
+
+    db.session.query(Match).delete()
+    rows = [{'venue_id': venue_id, 'artist_id': artist_id, 'score': score}
+            for (venue_id, artist_id), score in pairs.items()]
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(Match.__table__.insert(), rows[start:start + batch_size])
+    # suggestions are part of every detail page
+    touch_all()
+    db.session.commit()
+    response_cache.clear()
+    return len(rows)
+
+
+def suggestions_for(model, entity_id, limit=6):
+    """Best precomputed matches for a venue (artists) or an artist (venues)."""
+    if model is Venue:
+        other, own_fk, other_fk, prefix = Artist, Match.venue_id, Match.artist_id, 'artist'
+        seeking = Artist.seeking_venue
+    else:
+        other, own_fk, other_fk, prefix = Venue, Match.artist_id, Match.venue_id, 'venue'
+        seeking = Venue.looking_talent
+    # Match holds both sides' top K, so a pair can come from the other
+    # side's list; the flag may also have changed since the rebuild
+    rows = db.session.query(other.id, other.name, other.image_link, Match.score) \
+        .join(Match, other_fk == other.id) \
+        .filter(own_fk == entity_id, seeking.is_(True)) \
+        .order_by(Match.score.desc(), other.id) \
+        .limit(limit) \
+        .all()
+    return [{
+        prefix + '_id': row[0],
+        prefix + '_name': row[1],
+        prefix + '_image_link': row[2],
+        'score': row[3],
+    } for row in rows]
+
+
+#  CLI
+#  ----------------------------------------------------------------
+
+matches_cli = AppGroup('matches', help='Precompute artist-venue suggestions.')
+
+
+@matches_cli.command('rebuild')
+@click.option('--top-k', default=10, show_default=True, help='Matches kept per venue and per artist.')
+@click.option('--chunk', default=1024, show_default=True, help='Rows scored per matrix block.')
+def rebuild_command(top_k, chunk):
+    """Score all artist-venue pairs and store the best matches."""
+    started = time.perf_counter()
+    stored = rebuild_matches(top_k=top_k, chunk=chunk)
+    click.echo('Stored %d match(es) in %.1fs.' % (stored, time.perf_counter() - started))
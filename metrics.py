@@ -0,0 +1,147 @@
+import os
+import time
+import weakref
+from flask import Response, current_app, g, has_request_context, request
+from jinja2 import Template
+from sqlalchemy import event
+from models import db
+from sql_profile import query_observers
+
+#----------------------------------------------------------------------------#
+# Prometheus metrics.
+#----------------------------------------------------------------------------#
+
+# /metrics exposes request latency per endpoint, requests in flight,
+# template render time, per-statement DB time, connection pool checkout
+# wait and cache hit/miss counts. Under gunicorn, set
+# PROMETHEUS_MULTIPROC_DIR to a directory shared by the workers (emptied
+# before they start, see gunicorn.conf.py); each worker then writes its
+# samples to memory-mapped files there and /metrics adds them up, so any
+# worker can answer a scrape. Needs the prometheus_client package.
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self._engines = weakref.WeakSet()
+
+    def init_app(self, app):
+        if not app.config['METRICS_ENABLED']:
+            return
+        if app.config['METRICS_MULTIPROC_DIR']:
+            # read by prometheus_client when it is first imported
+            os.environ['PROMETHEUS_MULTIPROC_DIR'] = app.config['METRICS_MULTIPROC_DIR']
+        if not self.enabled:
+            # collectors are registered once per process, however many apps are created
+            self._create_collectors()
+            query_observers.append(self._observe_query)
+            self.enabled = True
+
+        app.before_request(self._begin)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+        app.jinja_env.template_class = _timed_template(self.render_seconds)
+
+    def _create_collectors(self):
+        import prometheus_client as prometheus
+        from prometheus_client import multiprocess
+        self.prometheus = prometheus
+        self.multiprocess = multiprocess
+
+        self.request_seconds = prometheus.Histogram(
+            'fyyur_http_request_duration_seconds', 'Time to produce a response.',
+            ['method', 'endpoint', 'status'])
+        self.in_flight = prometheus.Gauge(
+            'fyyur_http_requests_in_flight', 'Requests being handled.', multiprocess_mode='livesum')
+        self.render_seconds = prometheus.Histogram(
+            'fyyur_template_render_seconds', 'Time to render a top-level template.', ['template'])
+        self.query_seconds = prometheus.Histogram(
+            'fyyur_db_query_duration_seconds', 'Time spent in each SQL statement.', ['endpoint'],
+            buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, float('inf')))
+        self.checkout_seconds = prometheus.Histogram(
+            'fyyur_db_pool_checkout_seconds', 'Time waiting for a pooled connection.',
+            buckets=(.0005, .001, .005, .01, .05, .1, .5, 1, 5, 30, float('inf')))
+        self.checked_out = prometheus.Gauge(
+            'fyyur_db_pool_checked_out', 'Pooled connections in use.', multiprocess_mode='livesum')
+        self.cache_lookups = prometheus.Counter(
+            'fyyur_cache_lookups_total', 'Cache lookups by cache and result.', ['cache', 'result'])
+
+    def instrument_engine(self, engine):
+        if not self.enabled or engine in self._engines:
+            return
+        self._engines.add(engine)
+        checked_out = self.checked_out
+        event.listen(engine, 'checkout', lambda *args: checked_out.inc())
+        event.listen(engine, 'checkin', lambda *args: checked_out.dec())
+        self._time_checkouts(engine)
+        # dispose() swaps in a new pool
+        event.listen(engine, 'engine_disposed', self._time_checkouts)
+
+    def _time_checkouts(self, engine):
+        pool = engine.pool
+        connect = type(pool).connect.__get__(pool)
+        observe = self.checkout_seconds.observe
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                observe(time.perf_counter() - started)
+        pool.connect = timed_connect
+
+    def cache_lookup(self, cache, hit):
+        if self.enabled:
+            self.cache_lookups.labels(cache, 'hit' if hit else 'miss').inc()
+
+    #  Hooks
+    #  ----------------------------------------------------------------
+
+    def _begin(self):
+        # engines are created lazily (and again if the database URI changes)
+        self.instrument_engine(db.engine)
+        replicas = current_app.extensions.get('replicas')
+        if replicas is not None:
+            for engine in replicas.engines():
+                self.instrument_engine(engine)
+        g.metrics_started = time.perf_counter()
+        self.in_flight.inc()
+
+    def _finish(self, response):
+        started = g.get('metrics_started')
+        if started is not None and request.endpoint != 'metrics':
+            self.request_seconds.labels(request.method, request.endpoint or 'unmatched',
+                                        response.status_code).observe(time.perf_counter() - started)
+        return response
+
+    def _teardown(self, exc):
+        if g.pop('metrics_started', None) is not None:
+            self.in_flight.dec()
+
+    def _observe_query(self, conn, statement, parameters, seconds):
+        endpoint = (request.endpoint or 'unmatched') if has_request_context() else 'none'
+        self.query_seconds.labels(endpoint).observe(seconds)
+
+    def view(self):
+        prometheus = self.prometheus
+        if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+            registry = prometheus.CollectorRegistry()
+            self.multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus.REGISTRY
+        return Response(prometheus.generate_latest(registry), content_type=prometheus.CONTENT_TYPE_LATEST)
+
+
+def _timed_template(histogram):
+    class TimedTemplate(Template):
+        def render(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super().render(*args, **kwargs)
+            finally:
+                histogram.labels(self.name or 'string').observe(time.perf_counter() - started)
+    return TimedTemplate
+
+
+metrics = Metrics()
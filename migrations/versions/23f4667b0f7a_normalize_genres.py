@@ -0,0 +1,91 @@
+"""normalize genres
+
+Revision ID: 23f4667b0f7a
+Revises: 5dc6353b18f1
+Create Date: 2026-10-18 13:02:44.615290
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '23f4667b0f7a'
+down_revision = '5dc6353b18f1'
+branch_labels = None
+depends_on = None
+
+# forms.GENRE_CHOICES at the time of this migration
+GENRES = [
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk',
+    'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+    'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll',
+    'Soul', 'Other',
+]
+
+
+def upgrade():
+    genre = op.create_table('Genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.bulk_insert(genre, [{'name': name} for name in GENRES])
+    op.create_table('VenueGenre',
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('venue_id', 'genre_id')
+    )
+    op.create_index('ix_VenueGenre_genre_id_venue_id', 'VenueGenre', ['genre_id', 'venue_id'], unique=False)
+    op.create_table('ArtistGenre',
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('artist_id', 'genre_id')
+    )
+    op.create_index('ix_ArtistGenre_genre_id_artist_id', 'ArtistGenre', ['genre_id', 'artist_id'], unique=False)
+
+    # move the arrays into the junction tables, keeping any genre outside the seed list
+    for table, column in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute('''
+            INSERT INTO "Genre" (name)
+            SELECT DISTINCT unnest(genres) FROM "{table}"
+            ON CONFLICT (name) DO NOTHING
+        '''.format(table=table))
+        op.execute('''
+            INSERT INTO "{table}Genre" ({column}, genre_id)
+            SELECT DISTINCT "{table}".id, "Genre".id
+            FROM "{table}" CROSS JOIN LATERAL unnest("{table}".genres) AS g(name)
+            JOIN "Genre" ON "Genre".name = g.name
+        '''.format(table=table, column=column))
+
+    op.drop_index('ix_Venue_genres', table_name='Venue')
+    op.drop_index('ix_Artist_genres', table_name='Artist')
+    op.drop_column('Venue', 'genres')
+    op.drop_column('Artist', 'genres')
+
+
+def downgrade():
+    op.add_column('Artist', sa.Column('genres', postgresql.ARRAY(sa.VARCHAR()), server_default='{}', nullable=False))
+    op.add_column('Venue', sa.Column('genres', postgresql.ARRAY(sa.VARCHAR()), server_default='{}', nullable=False))
+    for table, column in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute('''
+            UPDATE "{table}" SET genres = sub.genres
+            FROM (SELECT {column}, array_agg("Genre".name ORDER BY "Genre".id) AS genres
+                  FROM "{table}Genre" JOIN "Genre" ON "Genre".id = "{table}Genre".genre_id
+                  GROUP BY {column}) AS sub
+            WHERE sub.{column} = "{table}".id
+        '''.format(table=table, column=column))
+        op.alter_column(table, 'genres', server_default=None)
+    op.create_index('ix_Venue_genres', 'Venue', ['genres'], unique=False, postgresql_using='gin')
+    op.create_index('ix_Artist_genres', 'Artist', ['genres'], unique=False, postgresql_using='gin')
+    op.drop_index('ix_ArtistGenre_genre_id_artist_id', table_name='ArtistGenre')
+    op.drop_table('ArtistGenre')
+    op.drop_index('ix_VenueGenre_genre_id_venue_id', table_name='VenueGenre')
+    op.drop_table('VenueGenre')
+    op.drop_table('Genre')
@@ -0,0 +1,33 @@
+"""add search indexes
+
+Revision ID: 27cd79ec43c8
+Revises: 9c10461d146c
+Create Date: 2026-10-18 10:03:17.562091
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '27cd79ec43c8'
+down_revision = '9c10461d146c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # city substring matches and genre containment used by search
+    op.create_index('ix_Venue_city_trgm', 'Venue', ['city'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+    op.create_index('ix_Artist_city_trgm', 'Artist', ['city'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+    op.create_index('ix_Venue_genres', 'Venue', ['genres'], unique=False, postgresql_using='gin')
+    op.create_index('ix_Artist_genres', 'Artist', ['genres'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_Artist_genres', table_name='Artist')
+    op.drop_index('ix_Venue_genres', table_name='Venue')
+    op.drop_index('ix_Artist_city_trgm', table_name='Artist')
+    op.drop_index('ix_Venue_city_trgm', table_name='Venue')
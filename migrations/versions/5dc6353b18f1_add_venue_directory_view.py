@@ -0,0 +1,37 @@
+"""add venue directory view
+
+Revision ID: 5dc6353b18f1
+Revises: 8b36de29d221
+Create Date: 2026-10-18 12:14:05.927733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5dc6353b18f1'
+down_revision = '8b36de29d221'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the /venues directory; refreshed by `flask refresh-directory`
+    op.execute('''
+        CREATE MATERIALIZED VIEW "VenueDirectory" AS
+        SELECT "Venue".id, "Venue".city, "Venue".state, "Venue".name,
+               count("Show".id) AS num_upcoming_shows
+        FROM "Venue"
+        LEFT OUTER JOIN "Show"
+          ON "Show".venue_id = "Venue".id AND "Show".start_time > localtimestamp
+        GROUP BY "Venue".id
+    ''')
+    # REFRESH ... CONCURRENTLY needs a unique index
+    op.create_index('ix_VenueDirectory_id', 'VenueDirectory', ['id'], unique=True)
+    op.create_index('ix_VenueDirectory_state_city_name_id', 'VenueDirectory',
+                    ['state', 'city', 'name', 'id'], unique=False)
+
+
+def downgrade():
+    op.execute('DROP MATERIALIZED VIEW "VenueDirectory"')
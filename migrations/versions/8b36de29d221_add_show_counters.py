@@ -0,0 +1,91 @@
+"""add show counters
+
+Revision ID: 8b36de29d221
+Revises: 27cd79ec43c8
+Create Date: 2026-10-18 11:26:51.340817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b36de29d221'
+down_revision = '27cd79ec43c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Venue', sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('Venue', sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('Artist', sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('Artist', sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('ShowStatsClock',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rolled_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO "ShowStatsClock" (id, rolled_at) VALUES (1, localtimestamp)')
+
+    # backfill against the clock
+    for table, column in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute('''
+            UPDATE "{table}" SET
+              upcoming_shows_count = (SELECT count(*) FROM "Show"
+                WHERE "Show".{column} = "{table}".id
+                AND "Show".start_time > (SELECT rolled_at FROM "ShowStatsClock" WHERE id = 1)),
+              past_shows_count = (SELECT count(*) FROM "Show"
+                WHERE "Show".{column} = "{table}".id
+                AND "Show".start_time <= (SELECT rolled_at FROM "ShowStatsClock" WHERE id = 1))
+        '''.format(table=table, column=column))
+
+    # keep the counters in step with every write to Show, including cascades
+    # and bulk loads. the clock row is locked FOR SHARE so a concurrent
+    # roll-forward either sees this show or runs before it is counted
+    op.execute('''
+        CREATE FUNCTION show_stats_apply(v_id integer, a_id integer, t timestamp, delta integer)
+        RETURNS void AS $$
+        DECLARE
+          rolled timestamp;
+        BEGIN
+          SELECT rolled_at INTO rolled FROM "ShowStatsClock" WHERE id = 1 FOR SHARE;
+          IF t > rolled THEN
+            UPDATE "Venue" SET upcoming_shows_count = upcoming_shows_count + delta WHERE id = v_id;
+            UPDATE "Artist" SET upcoming_shows_count = upcoming_shows_count + delta WHERE id = a_id;
+          ELSE
+            UPDATE "Venue" SET past_shows_count = past_shows_count + delta WHERE id = v_id;
+            UPDATE "Artist" SET past_shows_count = past_shows_count + delta WHERE id = a_id;
+          END IF;
+        END
+        $$ LANGUAGE plpgsql
+    ''')
+    op.execute('''
+        CREATE FUNCTION show_stats_trigger() RETURNS trigger AS $$
+        BEGIN
+          IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM show_stats_apply(OLD.venue_id, OLD.artist_id, OLD.start_time, -1);
+          END IF;
+          IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM show_stats_apply(NEW.venue_id, NEW.artist_id, NEW.start_time, 1);
+          END IF;
+          RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    ''')
+    op.execute('''
+        CREATE TRIGGER show_stats
+        AFTER INSERT OR DELETE OR UPDATE OF venue_id, artist_id, start_time ON "Show"
+        FOR EACH ROW EXECUTE PROCEDURE show_stats_trigger()
+    ''')
+
+
+def downgrade():
+    op.execute('DROP TRIGGER show_stats ON "Show"')
+    op.execute('DROP FUNCTION show_stats_trigger()')
+    op.execute('DROP FUNCTION show_stats_apply(integer, integer, timestamp, integer)')
+    op.drop_table('ShowStatsClock')
+    op.drop_column('Artist', 'past_shows_count')
+    op.drop_column('Artist', 'upcoming_shows_count')
+    op.drop_column('Venue', 'past_shows_count')
+    op.drop_column('Venue', 'upcoming_shows_count')
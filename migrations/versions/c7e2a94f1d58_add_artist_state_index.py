@@ -0,0 +1,25 @@
+"""add artist state index
+
+Revision ID: c7e2a94f1d58
+Revises: f41c9a27d0b3
+Create Date: 2026-10-18 19:12:44.203117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a94f1d58'
+down_revision = 'f41c9a27d0b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # search's exact state match; without it the whole OR falls back to a seq scan
+    op.create_index('ix_Artist_state', 'Artist', ['state'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Artist_state', table_name='Artist')
@@ -0,0 +1,66 @@
+"""touch suggestion counterparts
+
+Revision ID: d3a81f0c6b27
+Revises: c7e2a94f1d58
+Create Date: 2026-10-18 20:41:09.385112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a81f0c6b27'
+down_revision = 'c7e2a94f1d58'
+branch_labels = None
+depends_on = None
+
+# entity whose suggestion tile is shown on the other side's pages, and the
+# flag that decides whether it is suggested at all (see matching.suggestions_for)
+SEEKING = (
+    ('Artist', 'seeking_venue'),
+    ('Venue', 'looking_talent'),
+)
+
+
+def _counterparts_trigger(table, columns):
+    op.execute('DROP TRIGGER catalog_touch_counterparts ON "{table}"'.format(table=table))
+    op.execute('''
+        CREATE TRIGGER catalog_touch_counterparts AFTER UPDATE OF {columns} ON "{table}"
+        FOR EACH ROW
+        WHEN ({changed})
+        EXECUTE PROCEDURE {function}_touch_counterparts()
+    '''.format(table=table, function=table.lower(), columns=', '.join(columns),
+               changed=' OR '.join('OLD.{0} IS DISTINCT FROM NEW.{0}'.format(column) for column in columns)))
+
+
+def upgrade():
+    # toggling the seeking flag adds or removes the entity from the other
+    # side's suggestions, so it touches those pages like a rename does
+    for table, flag in SEEKING:
+        _counterparts_trigger(table, ('name', 'image_link', flag))
+
+    # deleting a venue or artist cascades its Match rows away; touch the
+    # side that is still there so its page stops suggesting the deleted one.
+    # the deleted side's rows are gone, so the updates skip them
+    op.execute('''
+        CREATE FUNCTION match_touch_old() RETURNS trigger AS $$
+        BEGIN
+          UPDATE "Venue" SET updated_at = updated_at WHERE id IN (SELECT venue_id FROM changed);
+          UPDATE "Artist" SET updated_at = updated_at WHERE id IN (SELECT artist_id FROM changed);
+          RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    ''')
+    op.execute('''
+        CREATE TRIGGER catalog_touch_old AFTER DELETE ON "Match"
+        REFERENCING OLD TABLE AS changed
+        FOR EACH STATEMENT EXECUTE PROCEDURE match_touch_old()
+    ''')
+
+
+def downgrade():
+    op.execute('DROP TRIGGER catalog_touch_old ON "Match"')
+    op.execute('DROP FUNCTION match_touch_old()')
+    for table, _ in SEEKING:
+        _counterparts_trigger(table, ('name', 'image_link'))
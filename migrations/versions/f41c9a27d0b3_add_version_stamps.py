@@ -0,0 +1,144 @@
+"""add version stamps
+
+Revision ID: f41c9a27d0b3
+Revises: bd03432af18c
+Create Date: 2026-10-18 15:02:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f41c9a27d0b3'
+down_revision = 'bd03432af18c'
+branch_labels = None
+depends_on = None
+
+UTC_NOW = sa.text("(now() AT TIME ZONE 'utc')")
+
+CATALOG_TABLES = ('Venue', 'Artist', 'Show', 'VenueGenre', 'ArtistGenre')
+
+# junction table, the column pointing at the entity, the entity table
+JUNCTIONS = (
+    ('VenueGenre', 'venue_id', 'Venue'),
+    ('ArtistGenre', 'artist_id', 'Artist'),
+)
+
+# entity whose name/image is shown on the other side's pages, the other side,
+# and the Show/Match columns for (entity, other side)
+COUNTERPARTS = (
+    ('Artist', 'Venue', 'artist_id', 'venue_id'),
+    ('Venue', 'Artist', 'venue_id', 'artist_id'),
+)
+
+
+def upgrade():
+    op.add_column('Venue', sa.Column('updated_at', sa.DateTime(), server_default=UTC_NOW, nullable=False))
+    op.add_column('Artist', sa.Column('updated_at', sa.DateTime(), server_default=UTC_NOW, nullable=False))
+    op.create_table('CatalogVersion',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=UTC_NOW, nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO "CatalogVersion" (id) VALUES (1)')
+
+    # any update of a venue or artist row moves its stamp forward, including
+    # the counter updates made by show_stats when its shows change. the stamp
+    # never goes backwards, so ETags and Last-Modified stay ordered
+    op.execute('''
+        CREATE FUNCTION catalog_touch() RETURNS trigger AS $$
+        BEGIN
+          NEW.updated_at := greatest(clock_timestamp() AT TIME ZONE 'utc',
+                                     OLD.updated_at + interval '1 microsecond');
+          RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    ''')
+    for table in ('Venue', 'Artist'):
+        op.execute('''
+            CREATE TRIGGER catalog_touch BEFORE UPDATE ON "{table}"
+            FOR EACH ROW EXECUTE PROCEDURE catalog_touch()
+        '''.format(table=table))
+
+    # genre changes only write the junction tables; touch the entity they belong to
+    for junction, column, table in JUNCTIONS:
+        for event, rows in (('INSERT', 'NEW'), ('DELETE', 'OLD')):
+            op.execute('''
+                CREATE FUNCTION {junction}_touch_{rows}() RETURNS trigger AS $$
+                BEGIN
+                  UPDATE "{table}" SET updated_at = updated_at
+                  WHERE id IN (SELECT {column} FROM changed);
+                  RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+            '''.format(junction=junction.lower(), rows=rows.lower(), table=table, column=column))
+            op.execute('''
+                CREATE TRIGGER catalog_touch_{rows} AFTER {event} ON "{junction}"
+                REFERENCING {rows} TABLE AS changed
+                FOR EACH STATEMENT EXECUTE PROCEDURE {function}_touch_{suffix}()
+            '''.format(rows=rows.lower(), event=event, junction=junction,
+                       function=junction.lower(), suffix=rows.lower()))
+
+    # venue pages list artist names and images (shows and suggestions) and
+    # the other way round, so renaming one touches the pages that show it
+    for table, other, own_column, other_column in COUNTERPARTS:
+        op.execute('''
+            CREATE FUNCTION {table}_touch_counterparts() RETURNS trigger AS $$
+            BEGIN
+              UPDATE "{other}" SET updated_at = updated_at
+              WHERE id IN (SELECT {other_column} FROM "Show" WHERE {own_column} = NEW.id
+                           UNION SELECT {other_column} FROM "Match" WHERE {own_column} = NEW.id);
+              RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        '''.format(table=table.lower(), other=other, own_column=own_column, other_column=other_column))
+        op.execute('''
+            CREATE TRIGGER catalog_touch_counterparts AFTER UPDATE OF name, image_link ON "{table}"
+            FOR EACH ROW
+            WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.image_link IS DISTINCT FROM NEW.image_link)
+            EXECUTE PROCEDURE {function}_touch_counterparts()
+        '''.format(table=table, function=table.lower()))
+
+    # one version for the whole catalog, read by the list pages. bumped once
+    # per top-level statement; writes made by other triggers are already
+    # covered by the statement that fired them
+    op.execute('''
+        CREATE FUNCTION catalog_version_bump() RETURNS trigger AS $$
+        BEGIN
+          IF pg_trigger_depth() = 1 THEN
+            UPDATE "CatalogVersion"
+            SET version = version + 1,
+                updated_at = greatest(clock_timestamp() AT TIME ZONE 'utc',
+                                      updated_at + interval '1 microsecond')
+            WHERE id = 1;
+          END IF;
+          RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    ''')
+    for table in CATALOG_TABLES:
+        op.execute('''
+            CREATE TRIGGER catalog_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}"
+            FOR EACH STATEMENT EXECUTE PROCEDURE catalog_version_bump()
+        '''.format(table=table))
+
+
+def downgrade():
+    for table in CATALOG_TABLES:
+        op.execute('DROP TRIGGER catalog_version ON "{table}"'.format(table=table))
+    op.execute('DROP FUNCTION catalog_version_bump()')
+    for table, _, _, _ in COUNTERPARTS:
+        op.execute('DROP TRIGGER catalog_touch_counterparts ON "{table}"'.format(table=table))
+        op.execute('DROP FUNCTION {table}_touch_counterparts()'.format(table=table.lower()))
+    for junction, _, _ in JUNCTIONS:
+        for rows in ('new', 'old'):
+            op.execute('DROP TRIGGER catalog_touch_{rows} ON "{junction}"'.format(rows=rows, junction=junction))
+            op.execute('DROP FUNCTION {junction}_touch_{rows}()'.format(junction=junction.lower(), rows=rows))
+    for table in ('Venue', 'Artist'):
+        op.execute('DROP TRIGGER catalog_touch ON "{table}"'.format(table=table))
+    op.execute('DROP FUNCTION catalog_touch()')
+    op.drop_table('CatalogVersion')
+    op.drop_column('Artist', 'updated_at')
+    op.drop_column('Venue', 'updated_at')
@@ -0,0 +1,94 @@
+import base64
+import json
+from datetime import datetime
+from flask import abort
+from sqlalchemy import DateTime, tuple_
+
+#----------------------------------------------------------------------------#
+# Keyset pagination.
+#----------------------------------------------------------------------------#
+
+# Pages are addressed by the key of the row at their edge instead of an
+# OFFSET, so fetching page 1000 costs the same index range scan as page 1.
+# The key columns must be unique together (end them with the primary key)
+# and are all sorted ascending.
+
+
+class KeysetPage:
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [datetime.fromisoformat(v) if isinstance(key.type, DateTime) else v
+                for key, v in zip(keys, values)]
+    except (ValueError, TypeError):
+        abort(400, 'Invalid page cursor')
+
+
+def _row_key(row, keys):
+    return [getattr(row, key.key) for key in keys]
+
+
+def keyset_paginate(query, keys, after=None, before=None, per_page=30):
+    """Return one KeysetPage of ``query`` ordered by the ``keys`` columns.
+
+    ``after`` / ``before`` are cursors taken from a previous page's
+    ``next_cursor`` / ``prev_cursor``. Every key column must also be
+    selected by the query so the edge rows can be turned into cursors.
+    """
+    if before:
+        values = decode_cursor(before, keys)
+        rows = query.filter(tuple_(*keys) < tuple_(*values)) \
+            .order_by(*[key.desc() for key in keys]) \
+            .limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        if not rows:
+            return KeysetPage(rows, per_page)
+        return KeysetPage(rows, per_page,
+                          next_cursor=encode_cursor(_row_key(rows[-1], keys)),
+                          prev_cursor=encode_cursor(_row_key(rows[0], keys)) if has_more else None)
+
+    if after:
+        values = decode_cursor(after, keys)
+        query = query.filter(tuple_(*keys) > tuple_(*values))
+    rows = query.order_by(*keys).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not rows:
+        return KeysetPage(rows, per_page)
+    return KeysetPage(rows, per_page,
+                      next_cursor=encode_cursor(_row_key(rows[-1], keys)) if has_more else None,
+                      prev_cursor=encode_cursor(_row_key(rows[0], keys)) if after else None)
+
+
+def page_args(request, config):
+    """Read the after/before/per_page arguments shared by the list routes."""
+    per_page = request.args.get('per_page', config['PER_PAGE'], type=int)
+    return {
+        'after': request.args.get('after'),
+        'before': request.args.get('before'),
+        'per_page': max(1, min(per_page, config['MAX_PER_PAGE'])),
+    }
@@ -0,0 +1,146 @@
+from datetime import datetime
+from sqlalchemy import func, or_
+from forms import GENRE_CHOICES
+from models import db, Venue, Artist, Show, Genre, VenueGenre, ArtistGenre
+
+#----------------------------------------------------------------------------#
+# Detail pages.
+#----------------------------------------------------------------------------#
+
+# for each detail page: the Show column pointing at the entity, and the
+# Show column / model / key prefix of the counterpart listed on its tiles
+DETAIL_SHOWS = {
+    Venue: (Show.venue_id, Show.artist_id, Artist, 'artist'),
+    Artist: (Show.artist_id, Show.venue_id, Venue, 'venue'),
+}
+
+
+def load_shows(model, entity_id, now=None):
+    """Past and upcoming shows of a venue or artist, in one query.
+
+    Each show is joined to its counterpart's name and image and flagged
+    upcoming/past in SQL against a single ``now``, a datetime or a SQL
+    expression such as show_stats.rolled_at(). Returns
+    ``(past_shows, upcoming_shows)``.
+    """
+    if now is None:
+        now = datetime.now()
+    own_fk, other_fk, other, prefix = DETAIL_SHOWS[model]
+    rows = db.session.query(
+        Show.id,
+        other_fk.label(prefix + '_id'),
+        other.name.label(prefix + '_name'),
+        other.image_link.label(prefix + '_image_link'),
+        Show.start_time,
+        (Show.start_time > now).label('upcoming')
+    ).join(other, other_fk == other.id) \
+        .filter(own_fk == entity_id) \
+        .order_by(Show.start_time, Show.id) \
+        .all()
+
+    past_shows = []
+    upcoming_shows = []
+    for row in rows:
+        show = {
+            'id': row.id,
+            prefix + '_id': row[1],
+            prefix + '_name': row[2],
+            prefix + '_image_link': row[3],
+            'start_time': row.start_time,
+        }
+        (upcoming_shows if row.upcoming else past_shows).append(show)
+    return past_shows, upcoming_shows
+
+
+def load_detail(model, entity_id, now=None):
+    """Load a venue or artist with its past and upcoming shows.
+
+    Two queries: the entity itself, then its shows (see load_shows).
+    Returns ``(entity, past_shows, upcoming_shows)`` with ``entity`` set to
+    None when it does not exist.
+    """
+    entity = model.query.get(entity_id)
+    if entity is None:
+        return None, [], []
+    past_shows, upcoming_shows = load_shows(model, entity_id, now)
+    return entity, past_shows, upcoming_shows
+
+
+#----------------------------------------------------------------------------#
+# Genres.
+#----------------------------------------------------------------------------#
+
+GENRES_BY_LOWER = {genre.lower(): genre for genre, _ in GENRE_CHOICES}
+
+GENRE_JUNCTIONS = {
+    Venue: VenueGenre.c.venue_id,
+    Artist: ArtistGenre.c.artist_id,
+}
+
+
+def genre_ids(model, genre):
+    """Query for the ids of the venues or artists tagged with ``genre``.
+
+    Reads only the junction table's (genre_id, <entity>_id) index.
+    """
+    entity_fk = GENRE_JUNCTIONS[model]
+    return db.session.query(entity_fk.label('id')) \
+        .join(Genre, Genre.id == entity_fk.table.c.genre_id) \
+        .filter(Genre.name == genre)
+
+
+def genre_filter(model, genre, id_column=None):
+    """Filter clause keeping the venues or artists tagged with ``genre``.
+
+    A semi-join through the junction table (see genre_ids). ``id_column``
+    defaults to ``model.id`` and lets the same filter apply to views keyed
+    by the entity id.
+    """
+    return (model.id if id_column is None else id_column).in_(genre_ids(model, genre))
+
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+
+def _like_pattern(term):
+    escaped = term.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+    return '%' + escaped + '%'
+
+
+def search(model, term, limit=50):
+    """Ranked venue or artist search returning ``(total, rows)``.
+
+    Matches the name as a substring or fuzzily (pg_trgm ``%``), the city as
+    a substring, the state code exactly, or a genre, ranking by name
+    similarity. ``total`` comes from a window count over the same query so
+    the count and the first ``limit`` rows cost a single round-trip.
+
+    Every column condition has an index (trigram on name and city, btree on
+    state), so the OR can run as a BitmapOr. The genre match lives in another
+    table, where it would force a sequential scan, so it is a UNION branch.
+    """
+    term = term.strip()
+    pattern = _like_pattern(term)
+    matched = db.session.query(model.id.label('id')).filter(or_(
+        model.name.ilike(pattern, escape='!'),
+        model.name.op('%')(term),
+        model.city.ilike(pattern, escape='!'),
+        model.state == term.upper(),
+    ))
+    genre = GENRES_BY_LOWER.get(term.lower())
+    if genre:
+        matched = matched.union(genre_ids(model, genre))
+    matched = matched.subquery()
+
+    rank = func.similarity(model.name, term)
+    rows = db.session.query(
+        model.id, model.name, model.city, model.state,
+        rank.label('rank'),
+        func.count().over().label('total')
+    ).join(matched, matched.c.id == model.id) \
+        .order_by(rank.desc(), model.name, model.id) \
+        .limit(limit) \
+        .all()
+    return (rows[0].total if rows else 0), rows
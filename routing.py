@@ -0,0 +1,158 @@
+import itertools
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm
+
+#----------------------------------------------------------------------------#
+# Read-replica routing.
+#----------------------------------------------------------------------------#
+
+# Views marked @read_replica read from one of the SQLALCHEMY_REPLICA_URIS,
+# picked round-robin per request among the replicas whose replication lag
+# is under REPLICA_MAX_LAG_SECONDS (checked at most once per
+# REPLICA_CHECK_INTERVAL); with none healthy the primary answers. Writes,
+# SELECT ... FOR UPDATE and anything after a flush go to the primary, as
+# does everything outside a request (CLI, migrations). A request that
+# wrote sets a cookie sending that client's reads to the primary for
+# REPLICA_STICKY_SECONDS, so it sees its own changes; the worker itself
+# reads from the primary for REPLICA_MAX_LAG_SECONDS after a write, so the
+# caches are not refilled from a replica that has not caught up.
+
+STICKY_COOKIE = 'read_primary'
+
+# seconds the replica is behind; 0 when it has replayed everything it received
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def read_replica(view):
+    """Let ``view`` read from a replica."""
+    view.read_replica = True
+    return view
+
+
+class RoutingSession(SignallingSession):
+    def __init__(self, db, **options):
+        self.db = db
+        SignallingSession.__init__(self, db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if has_request_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                # later reads in this session must see the write
+                self.info['wrote'] = g.db_wrote = True
+            elif (g.get('replica') and not self.info.get('wrote')
+                    and getattr(clause, 'is_select', False)
+                    and getattr(clause, '_for_update_arg', None) is None):
+                return self.db.get_engine(self.app, bind=g.replica)
+        return SignallingSession.get_bind(self, mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+class ReplicaSet:
+    def __init__(self, app, db, names):
+        config = app.config
+        self.app = app
+        self.db = db
+        self.names = names
+        self.max_lag = config['REPLICA_MAX_LAG_SECONDS']
+        self.check_interval = config['REPLICA_CHECK_INTERVAL']
+        self.sticky = config['REPLICA_STICKY_SECONDS']
+        self.last_write = float('-inf')
+        self._status = {}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def engines(self):
+        return [self.db.get_engine(self.app, bind=name) for name in self.names]
+
+    def pick(self):
+        """The bind name of the next healthy replica, or None for the primary."""
+        if time.monotonic() - self.last_write < self.max_lag:
+            return None
+        healthy = [name for name in self.names if self.healthy(name)]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def healthy(self, name):
+        checked_at, ok = self._status.get(name, (None, False))
+        now = time.monotonic()
+        if checked_at is not None and now - checked_at < self.check_interval:
+            return ok
+        # one thread checks; the others go on with the last result
+        if not self._lock.acquire(blocking=checked_at is None):
+            return ok
+        try:
+            checked_at, ok = self._status.get(name, (None, False))
+            if checked_at is None or now - checked_at >= self.check_interval:
+                ok = self._check(name)
+                self._status[name] = (time.monotonic(), ok)
+            return ok
+        finally:
+            self._lock.release()
+
+    def lag(self, name):
+        """Replication lag of ``name`` in seconds."""
+        engine = self.db.get_engine(self.app, bind=name)
+        # a raw DBAPI connection: keeps the check out of the request's SQL profile
+        connection = engine.raw_connection()
+        try:
+            if engine.dialect.name != 'postgresql':
+                return 0
+            cursor = connection.cursor()
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0])
+        finally:
+            connection.close()
+
+    def _check(self, name):
+        try:
+            lag = self.lag(name)
+        except Exception:
+            self.app.logger.warning('Replica %s is unreachable; reading from the primary', name, exc_info=True)
+            return False
+        if lag > self.max_lag:
+            self.app.logger.warning('Replica %s is %.1fs behind; reading from the primary', name, lag)
+            return False
+        return True
+
+    #  Request hooks
+    #  ----------------------------------------------------------------
+
+    def _begin(self):
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'read_replica', False) and not request.cookies.get(STICKY_COOKIE):
+            g.replica = self.pick()
+
+    def _finish(self, response):
+        if g.get('db_wrote'):
+            self.last_write = time.monotonic()
+            response.set_cookie(STICKY_COOKIE, '1', max_age=self.sticky, httponly=True, samesite='Lax')
+        return response
+
+
+def init_replicas(app, db):
+    """Register SQLALCHEMY_REPLICA_URIS as binds; call before ``db.init_app``."""
+    uris = app.config['SQLALCHEMY_REPLICA_URIS']
+    if not uris:
+        return None
+    names = ['replica%d' % i for i in range(len(uris))]
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds.update(zip(names, uris))
+    app.config['SQLALCHEMY_BINDS'] = binds
+    replicas = app.extensions['replicas'] = ReplicaSet(app, db, names)
+    app.before_request(replicas._begin)
+    app.after_request(replicas._finish)
+    return replicas
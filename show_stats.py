@@ -0,0 +1,137 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func
+from models import db, Venue, Artist, Show, ShowStatsClock
+from cache import response_cache
+
+#----------------------------------------------------------------------------#
+# Upcoming / past show counters.
+#----------------------------------------------------------------------------#
+
+# Venue and Artist carry upcoming_shows_count / past_shows_count so list
+# pages read them per row instead of scanning Show. The counters describe
+# the catalog as of ShowStatsClock.rolled_at: the show_stats trigger (see
+# the add_show_counters migration) counts a written show as upcoming when
+# it starts after that moment, and roll_forward() periodically moves the
+# shows that have started since then over to past.
+
+COUNTED = (
+    (Venue, Show.venue_id),
+    (Artist, Show.artist_id),
+)
+
+
+def rolled_at():
+    """The clock as a SQL expression, for splitting shows the way the counters do.
+
+    A scalar subquery, so it rides along in the query using it; falls back
+    to the database's time if the clock row is missing.
+    """
+    clock = db.session.query(ShowStatsClock.rolled_at).filter(ShowStatsClock.id == 1)
+    return func.coalesce(clock.scalar_subquery(), func.localtimestamp())
+
+
+def roll_forward(now=None):
+    """Move shows that started since the last roll from upcoming to past.
+
+    Returns the number of shows moved. Holds the clock row lock for the
+    duration so show writes wait and are counted against the new time.
+    """
+    if now is None:
+        # the database's clock, which the show_stats trigger compares against;
+        # the app servers' clocks and time zones may differ from it
+        now = db.session.query(func.localtimestamp()).scalar()
+    clock = ShowStatsClock.query.with_for_update().get(1)
+    if clock is None or now <= clock.rolled_at:
+        db.session.rollback()
+        return 0
+
+    moved = 0
+    for model, show_fk in COUNTED:
+        crossed = db.session.query(show_fk, func.count(Show.id)) \
+            .filter(Show.start_time > clock.rolled_at, Show.start_time <= now) \
+            .group_by(show_fk) \
+            .all()
+        for entity_id, count in crossed:
+            model.query.filter(model.id == entity_id).update({
+                model.upcoming_shows_count: model.upcoming_shows_count - count,
+                model.past_shows_count: model.past_shows_count + count,
+            }, synchronize_session=False)
+        if model is Venue:
+            moved = sum(count for _, count in crossed)
+
+    clock.rolled_at = now
+    db.session.commit()
+    # the counter updates move the venues' and artists' version stamps (see
+    # the add_version_stamps migration), which is what the web workers' caches
+    # are keyed on; invalidating here only frees entries in a shared cache
+    if moved:
+        response_cache.invalidate({'list:venues', 'list:artists'})
+    return moved
+
+
+def find_drift():
+    """Recompute every counter and return the rows that disagree.
+
+    Each item is ``(model name, id, stored (upcoming, past), actual (upcoming, past))``.
+    """
+    rolled_at = db.session.query(ShowStatsClock.rolled_at).filter(ShowStatsClock.id == 1).scalar()
+    drift = []
+    for model, show_fk in COUNTED:
+        upcoming = func.count(Show.id).filter(Show.start_time > rolled_at)
+        past = func.count(Show.id).filter(Show.start_time <= rolled_at)
+        rows = db.session.query(
+            model.id, model.upcoming_shows_count, model.past_shows_count,
+            upcoming.label('upcoming'), past.label('past')
+        ).outerjoin(Show, show_fk == model.id) \
+            .group_by(model.id) \
+            .all()
+        for row in rows:
+            if (row.upcoming_shows_count, row.past_shows_count) != (row.upcoming, row.past):
+                drift.append((model.__name__, row.id,
+                              (row.upcoming_shows_count, row.past_shows_count),
+                              (row.upcoming, row.past)))
+    return drift
+
+
+def fix_drift(drift):
+    models = {model.__name__: model for model, _ in COUNTED}
+    for name, entity_id, _, (upcoming, past) in drift:
+        model = models[name]
+        model.query.filter(model.id == entity_id).update({
+            model.upcoming_shows_count: upcoming,
+            model.past_shows_count: past,
+        }, synchronize_session=False)
+    db.session.commit()
+    if drift:
+        response_cache.invalidate({'list:venues', 'list:artists'})
+
+
+#  CLI
+#  ----------------------------------------------------------------
+
+show_stats_cli = AppGroup('show-stats', help='Maintain the upcoming/past show counters.')
+
+
+@show_stats_cli.command('roll')
+def roll_command():
+    """Move started shows from upcoming to past (run every few minutes)."""
+    moved = roll_forward()
+    click.echo('Moved %d show(s) from upcoming to past.' % moved)
+
+
+@show_stats_cli.command('check')
+@click.option('--fix', is_flag=True, help='Overwrite drifted counters with the recomputed values.')
+def check_command(fix):
+    """Recompute the counters and report any drift."""
+    drift = find_drift()
+    for name, entity_id, stored, actual in drift:
+        click.echo('%s %s: stored upcoming/past %s/%s, actual %s/%s'
+                   % (name, entity_id, stored[0], stored[1], actual[0], actual[1]))
+    if fix and drift:
+        fix_drift(drift)
+        click.echo('Fixed %d row(s).' % len(drift))
+    elif not drift:
+        click.echo('Counters are consistent.')
+    else:
+        raise SystemExit(1)
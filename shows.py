@@ -0,0 +1,93 @@
+import sys
+from flask import Blueprint, current_app, flash, render_template, request
+from forms import ShowForm
+from models import db, Venue, Artist, Show
+from pagination import keyset_paginate, page_args
+from cache import cached
+from conditional import conditional, catalog_stamp
+from routing import read_replica
+from sql_profile import query_budget
+
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+blueprint = Blueprint('shows', __name__)
+
+@blueprint.route('/shows')
+@read_replica
+@query_budget(2)
+@conditional(catalog_stamp)
+@cached('list:shows')
+def shows():
+  # displays list of shows at /shows
+  # one joined query selecting only the columns the show tile needs,
+  # paged by (start_time, id) so deep pages do not scan skipped rows
+  query = db.session.query(
+      Show.id, Show.venue_id, Venue.name.label('venue_name'),
+      Show.artist_id, Artist.name.label('artist_name'),
+      Artist.image_link.label('artist_image_link'),
+      Show.start_time
+    ).join(Venue, Show.venue_id == Venue.id) \
+    .join(Artist, Show.artist_id == Artist.id)
+  page = keyset_paginate(query, [Show.start_time, Show.id], **page_args(request, current_app.config))
+
+  show_list = [{'id': show.id,
+                'venue_id': show.venue_id,
+                'venue_name': show.venue_name,
+                'artist_id': show.artist_id,
+                'artist_name': show.artist_name,
+                'artist_image_link': show.artist_image_link,
+                'start_time': show.start_time
+                } for show in page.items]
+  # returns show page with show metadata
+  return render_template('pages/shows.html', shows=show_list, page=page)
+
+
+@blueprint.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+
+@blueprint.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  # called to create new shows in the db, upon submitting new show listing form
+  # TODO: insert form data as a new Show record in the db, instead
+  form = ShowForm()
+  body = {}
+  error=False
+  try:
+    if form.validate():
+      artist_id = request.form['artist_id']
+      venue_id = request.form['venue_id']
+      start_time = request.form['start_time']
+
+      show = Show(artist_id=artist_id, venue_id=venue_id, start_time=start_time)
+    
+      db.session.add(show)
+      db.session.commit()
+      body['id'] = show.id
+      body['artist_id'] = show.artist_id
+      body['venue_id'] = show.venue_id
+      body['start_time'] = show.start_time
+      # on successful db insert, flash success
+      flash('Show was successfully listed!')
+    else:
+        for field, message in form.errors.items():
+            flash(field + ' - ' + str(message), 'danger') 
+            return render_template('pages/new_venue.html', form=form)   
+
+  except:
+      error=True
+      db.session.rollback()
+      flash('An error occurred. Show could not be listed.')
+      print(sys.exc_info())
+  finally:
+        db.session.close()
+  
+  # TODO: on unsuccessful db insert, flash an error instead.
+   
+  # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+  return render_template('pages/home.html')
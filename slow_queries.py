@@ -0,0 +1,164 @@
+import glob
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+import click
+from flask import current_app, has_request_context, request
+from flask.cli import AppGroup
+from sql_profile import fingerprint, query_observers
+
+#----------------------------------------------------------------------------#
+# Slow-query log.
+#----------------------------------------------------------------------------#
+
+# Statements slower than SLOW_QUERY_MS are written, one JSON object per
+# line, to a rotating log with their parameters, the route that ran them
+# and, on PostgreSQL, an EXPLAIN (ANALYZE, BUFFERS) plan. Only a
+# SLOW_QUERY_SAMPLE_RATE fraction of slow statements is recorded, and a
+# fingerprint is explained at most once per SLOW_QUERY_EXPLAIN_INTERVAL,
+# since ANALYZE runs the statement a second time. Only SELECTs are
+# explained, inside a savepoint so a failing EXPLAIN cannot abort the
+# caller's transaction. `flask slow-queries top` ranks what was logged.
+
+MAX_PARAMETER_LENGTH = 200
+
+
+def _loggable(parameters):
+    def short(value):
+        text = value if isinstance(value, (int, float, bool, type(None))) else str(value)
+        if isinstance(text, str) and len(text) > MAX_PARAMETER_LENGTH:
+            text = text[:MAX_PARAMETER_LENGTH] + '...'
+        return text
+    if isinstance(parameters, dict):
+        return {key: short(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [short(value) for value in parameters]
+    return short(parameters)
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.logger = logging.getLogger('fyyur.slow_queries')
+        self.logger.propagate = False
+        self.threshold = None
+        self.sample_rate = 1.0
+        self.explain = True
+        self.explain_interval = 300
+        self._explained = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        config = app.config
+        if config['SLOW_QUERY_MS'] is None:
+            return
+        self.threshold = config['SLOW_QUERY_MS'] / 1000
+        self.sample_rate = config['SLOW_QUERY_SAMPLE_RATE']
+        self.explain = config['SLOW_QUERY_EXPLAIN']
+        self.explain_interval = config['SLOW_QUERY_EXPLAIN_INTERVAL']
+        if not self.logger.handlers:
+            handler = RotatingFileHandler(config['SLOW_QUERY_LOG'], maxBytes=config['SLOW_QUERY_LOG_MAX_BYTES'],
+                                          backupCount=config['SLOW_QUERY_LOG_BACKUPS'])
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+        if self.observe not in query_observers:
+            query_observers.append(self.observe)
+
+    def observe(self, conn, statement, parameters, seconds):
+        if self.threshold is None or seconds < self.threshold:
+            return
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        key = fingerprint(statement)
+        entry = {
+            'at': datetime.utcnow().isoformat(timespec='seconds'),
+            'ms': round(seconds * 1000, 1),
+            'sample_rate': self.sample_rate,
+            'fingerprint': key,
+            'statement': statement,
+            'parameters': _loggable(parameters),
+            'route': '%s %s' % (request.method, request.path) if has_request_context() else None,
+            'endpoint': request.endpoint if has_request_context() else None,
+        }
+        if self.explain and self._should_explain(conn, statement, key):
+            entry['plan'] = self._explain(conn, statement, parameters)
+        self.logger.info(json.dumps(entry, default=str))
+
+    def _should_explain(self, conn, statement, key):
+        if conn.dialect.name != 'postgresql' or statement.lstrip()[:6].upper() != 'SELECT':
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained.get(key, -self.explain_interval) < self.explain_interval:
+                return False
+            self._explained[key] = now
+        return True
+
+    def _explain(self, conn, statement, parameters):
+        # a raw DBAPI cursor: keeps the EXPLAIN itself out of the engine events
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + statement, parameters)
+                plan = cursor.fetchone()[0]
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+                return plan
+            except Exception as e:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                return {'error': str(e)}
+        except Exception as e:
+            return {'error': str(e)}
+        finally:
+            cursor.close()
+
+
+slow_query_log = SlowQueryLog()
+
+
+#  CLI
+#  ----------------------------------------------------------------
+
+def summarize(paths):
+    """Aggregate logged slow queries by fingerprint, heaviest total time first."""
+    totals = defaultdict(lambda: {'count': 0.0, 'ms': 0.0, 'max_ms': 0.0, 'routes': defaultdict(float)})
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                # each logged query stands for 1 / sample_rate slow queries
+                weight = 1 / (entry.get('sample_rate') or 1)
+                total = totals[entry['fingerprint']]
+                total['count'] += weight
+                total['ms'] += entry['ms'] * weight
+                total['max_ms'] = max(total['max_ms'], entry['ms'])
+                total['routes'][entry.get('route') or '-'] += weight
+    return sorted(totals.items(), key=lambda item: item[1]['ms'], reverse=True)
+
+
+slow_queries_cli = AppGroup('slow-queries', help='Inspect the slow-query log.')
+
+
+@slow_queries_cli.command('top')
+@click.option('--limit', default=10, show_default=True, help='Statements to show.')
+@click.option('--log', 'log_path', help='Defaults to SLOW_QUERY_LOG, including rotated files.')
+def top_command(limit, log_path):
+    """Show the statements with the most total time in the slow-query log."""
+    base = log_path or current_app.config['SLOW_QUERY_LOG']
+    paths = sorted(glob.glob(base) + glob.glob(base + '.[0-9]*'))
+    if not paths:
+        click.echo('No slow-query log at %s.' % base)
+        return
+    for key, total in summarize(paths)[:limit]:
+        route = max(total['routes'], key=total['routes'].get)
+        click.echo('%10.0fms total  %6.0f x  %8.1fms avg  %8.1fms max  %s'
+                   % (total['ms'], total['count'], total['ms'] / total['count'], total['max_ms'], route))
+        click.echo('    %s' % key)
@@ -0,0 +1,132 @@
+import re
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, render_template, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Per-request SQL profile.
+#----------------------------------------------------------------------------#
+
+# Every statement run while handling a request is timed from the
+# before/after_cursor_execute engine events and counted per fingerprint
+# (the statement with its parameters and IN lists collapsed). At the end of
+# the request the totals go out as a Server-Timing header and, on HTML
+# pages, a debug panel; a fingerprint repeated SQL_REPEAT_THRESHOLD times
+# is logged as a likely N+1, and a route issuing more queries than its
+# budget is logged, or fails outright with SQL_QUERY_BUDGET_STRICT (tests).
+
+_PARAMS = re.compile(r"%\(\w+\)s|%s|\?|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    """``statement`` with literals and parameters replaced by ``?``."""
+    statement = _PARAMS.sub('?', _SPACE.sub(' ', statement.strip()))
+    return _IN_LISTS.sub('(?)', statement)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+        self.fingerprint_seconds = Counter()
+
+    def record(self, statement, seconds):
+        key = fingerprint(statement)
+        self.count += 1
+        self.seconds += seconds
+        self.fingerprints[key] += 1
+        self.fingerprint_seconds[key] += seconds
+
+    def repeated(self, threshold):
+        """``(fingerprint, count, seconds)`` for statements run ``threshold`` times or more."""
+        return [(key, count, self.fingerprint_seconds[key])
+                for key, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def query_budget(limit):
+    """Override SQL_QUERY_BUDGET for one view."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+#  Engine events
+#  ----------------------------------------------------------------
+
+# callables taking (conn, statement, parameters, seconds) for every statement
+query_observers = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['query_started'].pop()
+    if has_request_context():
+        profile = g.get('sql_profile')
+        if profile is not None:
+            profile.record(statement, seconds)
+    for observer in query_observers:
+        observer(conn, statement, parameters, seconds)
+
+
+event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+#  Request hooks
+#  ----------------------------------------------------------------
+
+def _begin():
+    g.sql_profile = RequestProfile()
+
+
+def _finish(response):
+    profile = g.pop('sql_profile', None)
+    if profile is None:
+        return response
+    config = current_app.config
+
+    repeated = profile.repeated(config['SQL_REPEAT_THRESHOLD'])
+    for key, count, seconds in repeated:
+        current_app.logger.warning('Possible N+1 on %s %s: %d x %.1fms %s',
+                                   request.method, request.path, count, seconds * 1000, key)
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', config['SQL_QUERY_BUDGET'])
+    if budget is not None and profile.count > budget:
+        message = '%s %s ran %d queries (budget %d)' % (request.method, request.path, profile.count, budget)
+        if config['SQL_QUERY_BUDGET_STRICT']:
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+
+    if config['SQL_SERVER_TIMING']:
+        response.headers.add('Server-Timing', 'db;dur=%.1f;desc="%d queries"' % (profile.seconds * 1000, profile.count))
+        response.headers.add('Server-Timing', 'app;dur=%.1f' % ((time.perf_counter() - profile.started) * 1000))
+
+    if (config['SQL_DEBUG_PANEL'] and response.mimetype == 'text/html'
+            and response.status_code == 200 and not response.is_streamed):
+        body = response.get_data(as_text=True)
+        if '</body>' in body:
+            panel = render_template('layouts/sql_panel.html', profile=profile, repeated=repeated)
+            head, _, tail = body.rpartition('</body>')
+            response.set_data(head + panel + '</body>' + tail)
+    return response
+
+
+def init_app(app):
+    if app.config['SQL_PROFILE']:
+        app.before_request(_begin)
+        app.after_request(_finish)
@@ -2,3 +2,24 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// name suggestions for the navbar search boxes, from /api/autocomplete
+document.querySelectorAll('input[data-autocomplete]').forEach(function(input) {
+  var list = document.createElement('datalist');
+  list.id = 'autocomplete-' + input.dataset.autocomplete;
+  input.setAttribute('list', list.id);
+  input.parentNode.appendChild(list);
+  input.addEventListener('input', function() {
+    if (!input.value) { return; }
+    fetch('/api/autocomplete?type=' + input.dataset.autocomplete + '&q=' + encodeURIComponent(input.value))
+      .then(function(response) { return response.json(); })
+      .then(function(body) {
+        list.innerHTML = '';
+        body.data.forEach(function(item) {
+          var option = document.createElement('option');
+          option.value = item.name;
+          list.appendChild(option);
+        });
+      });
+  });
+});
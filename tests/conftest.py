@@ -0,0 +1,91 @@
+import os
+import pytest
+from config import TestingConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# These tests need a Postgres database they may wipe: TEST_DATABASE_URL,
+# postgresql://postgres@localhost:5432/fyyur_test by default. Without one
+# they are skipped.
+
+pytest.importorskip('psycopg2')
+
+# The migration history starts from tables that were made by db.create_all()
+# (35d91cc2b82e drops them and nothing recreates them), so the schema is
+# built as create_all() left it at that revision and upgraded from there.
+BASELINE_REVISION = '35d91cc2b82e'
+
+
+def baseline_tables():
+    import sqlalchemy as sa
+    from sqlalchemy.dialects import postgresql
+    metadata = sa.MetaData()
+    sa.Table('Venue', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(120), nullable=False),
+        sa.Column('city', sa.String(120), nullable=False),
+        sa.Column('state', sa.String(120), nullable=False),
+        sa.Column('address', sa.String(120), nullable=False),
+        sa.Column('phone', sa.String(120), nullable=False),
+        sa.Column('image_link', sa.String(500)),
+        sa.Column('facebook_link', sa.String(120)),
+        sa.Column('website_link', sa.String()),
+        sa.Column('looking_talent', sa.Boolean),
+        sa.Column('seeking_description', sa.String()),
+        sa.Column('genres', postgresql.ARRAY(sa.String()), nullable=False, server_default='{}'),
+    )
+    sa.Table('Artist', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('city', sa.String(120), nullable=False),
+        sa.Column('state', sa.String(120), nullable=False),
+        sa.Column('phone', sa.String(120), nullable=False),
+        sa.Column('image_link', sa.String(500)),
+        sa.Column('facebook_link', sa.String(120)),
+        sa.Column('website', sa.String(500)),
+        sa.Column('seeking_venue', sa.Boolean),
+        sa.Column('looking_description', sa.String()),
+        sa.Column('genres', postgresql.ARRAY(sa.String()), nullable=False, server_default='{}'),
+    )
+    sa.Table('Show', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('artist_id', sa.Integer, sa.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('venue_id', sa.Integer, sa.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('start_time', sa.DateTime, nullable=False),
+    )
+    return metadata
+
+
+class PlanTestingConfig(TestingConfig):
+    # every request has to reach the database for its plan to be checked
+    CACHE_BACKEND = 'none'
+    METRICS_ENABLED = False
+
+
+@pytest.fixture(scope='session')
+def app():
+    from flask_migrate import Migrate, stamp, upgrade
+    from sqlalchemy.exc import OperationalError
+    from app import create_app
+    from models import db
+
+    app = create_app(PlanTestingConfig)
+    # db_setup only registers Migrate under the flask CLI
+    Migrate(app, db, directory=os.path.join(ROOT, 'migrations'))
+    with app.app_context():
+        try:
+            db.engine.connect().close()
+        except OperationalError:
+            pytest.skip('no Postgres at %s' % app.config['SQLALCHEMY_DATABASE_URI'])
+        db.session.execute('DROP SCHEMA public CASCADE; CREATE SCHEMA public')
+        db.session.commit()
+        baseline_tables().create_all(db.engine)
+        stamp(revision=BASELINE_REVISION)
+        upgrade()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,22 @@
+import json
+from models import Venue
+from importer import import_file
+
+VENUE = {
+    'city': 'Austin', 'state': 'TX', 'address': '1 Congress Ave', 'phone': '512-555-0100',
+    'genres': ['Jazz'], 'image_link': 'https://example.com/venue.png',
+    'facebook_link': 'https://www.facebook.com/venue', 'website_link': 'https://example.com',
+    'seeking_description': 'Looking for local bands',
+}
+
+
+def test_overlong_value_rejects_only_its_row(app, tmp_path):
+    path = tmp_path / 'venues.jsonl'
+    names = ['Import Before', 'x' * 121, 'Import After']
+    path.write_text(''.join(json.dumps(dict(VENUE, name=name)) + '\n' for name in names))
+    messages = []
+    with app.app_context():
+        loaded, rejected, _ = import_file('venues', str(path), echo=lambda message, err=False: messages.append(message))
+        assert (loaded, rejected) == (2, 1)
+        assert messages == ['line 2: name - Field cannot be longer than 120 characters.']
+        assert Venue.query.filter(Venue.name.in_(['Import Before', 'Import After'])).count() == 2
@@ -0,0 +1,123 @@
+import pytest
+from models import db
+from sql_profile import QueryBudgetExceeded, query_observers
+
+# The list, detail and search pages must stay on the indexes the migrations
+# create. Each page is requested against a seeded catalog, and every SELECT
+# it ran is EXPLAINed with sequential scans priced out: a Seq Scan that
+# still shows up on one of the large tables means no index can serve it.
+# The same pages must also stay within their @query_budget.
+
+LARGE_TABLES = {'Venue', 'Artist', 'Show', 'VenueGenre', 'ArtistGenre', 'Match'}
+INDEX_SCANS = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+VENUES = 2000
+ARTISTS = 2000
+SHOWS = 20000
+
+SEED = [
+    """INSERT INTO "Venue" (name, city, state, address, phone, looking_talent)
+       SELECT 'Venue ' || i, 'City ' || (i % 200), 'S' || (i % 50), i || ' Main St', '555-0100', i % 2 = 0
+       FROM generate_series(1, {}) AS i""".format(VENUES),
+    """INSERT INTO "Venue" (name, city, state, address, phone)
+       VALUES ('The Musical Hop', 'San Francisco', 'CA', '1015 Folsom Street', '123-123-1234')""",
+    """INSERT INTO "Artist" (name, city, state, phone, seeking_venue)
+       SELECT 'Artist ' || i, 'City ' || (i % 200), 'S' || (i % 50), '555-0100', i % 2 = 0
+       FROM generate_series(1, {}) AS i""".format(ARTISTS),
+    """INSERT INTO "Artist" (name, city, state, phone)
+       VALUES ('Hop Along', 'Philadelphia', 'PA', '300-400-5000')""",
+    """INSERT INTO "VenueGenre" (venue_id, genre_id)
+       SELECT v.id, g.id FROM "Venue" v JOIN "Genre" g ON g.id % 10 = v.id % 10
+       ON CONFLICT DO NOTHING""",
+    """INSERT INTO "ArtistGenre" (artist_id, genre_id)
+       SELECT a.id, g.id FROM "Artist" a JOIN "Genre" g ON g.id % 10 = a.id % 10
+       ON CONFLICT DO NOTHING""",
+    """INSERT INTO "Show" (artist_id, venue_id, start_time)
+       SELECT 1 + i % {0}, 1 + (i * 7) % {1}, localtimestamp + (i - {2} / 2) * interval '1 hour'
+       FROM generate_series(1, {2}) AS i""".format(ARTISTS, VENUES, SHOWS),
+]
+
+PAGES = [
+    ('get', '/shows', None),
+    ('get', '/venues', None),
+    ('get', '/venues?genre=Jazz', None),
+    ('get', '/artists', None),
+    ('get', '/artists?genre=Jazz', None),
+    ('get', '/venues/1', None),
+    ('get', '/artists/1', None),
+    ('post', '/venues/search', {'search_term': 'Hop'}),
+    ('post', '/venues/search', {'search_term': 'Jazz'}),
+    ('post', '/artists/search', {'search_term': 'Hop'}),
+    ('post', '/artists/search', {'search_term': 'Jazz'}),
+]
+
+
+@pytest.fixture(scope='module')
+def catalog(app):
+    with app.app_context():
+        for statement in SEED:
+            db.session.execute(statement)
+        db.session.execute('ANALYZE')
+        db.session.commit()
+
+
+def run_selects(client, method, path, data):
+    statements = []
+
+    def observe(conn, statement, parameters, seconds):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    query_observers.append(observe)
+    try:
+        response = getattr(client, method)(path, data=data)
+    finally:
+        query_observers.remove(observe)
+    assert response.status_code == 200
+    return statements
+
+
+def explain(statement, parameters):
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SET enable_seqscan = off')
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+        return cursor.fetchone()[0][0]['Plan']
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+@pytest.mark.parametrize('method, path, data', PAGES)
+def test_pages_use_indexes(app, client, catalog, method, path, data):
+    statements = run_selects(client, method, path, data)
+    assert statements
+    index_scans = set()
+    with app.app_context():
+        for statement, parameters in statements:
+            for node in plan_nodes(explain(statement, parameters)):
+                if node['Node Type'] == 'Seq Scan':
+                    assert node['Relation Name'] not in LARGE_TABLES, \
+                        'sequential scan on %s in:\n%s' % (node['Relation Name'], statement)
+                elif node['Node Type'] in INDEX_SCANS:
+                    index_scans.add(node['Index Name'])
+    assert index_scans
+
+
+@pytest.mark.parametrize('method, path, data', PAGES)
+def test_pages_stay_within_query_budget(app, client, catalog, method, path, data):
+    endpoint, _ = app.url_map.bind('localhost').match(path.split('?')[0], method=method.upper())
+    assert getattr(app.view_functions[endpoint], 'query_budget', None) is not None
+    # SQL_QUERY_BUDGET_STRICT is on under TestingConfig, so a request over budget raises
+    try:
+        response = getattr(client, method)(path, data=data)
+    except QueryBudgetExceeded as e:
+        pytest.fail(str(e))
+    assert response.status_code == 200
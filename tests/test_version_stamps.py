@@ -0,0 +1,64 @@
+from models import db, Venue, Artist, Match
+
+# Detail pages are cached and validated on their entity's updated_at (see
+# conditional.py), so every change to what a page shows has to move it.
+# These cover the suggestions, which live in the Match table.
+
+
+def stamp(model, entity_id):
+    return db.session.query(model.updated_at).filter(model.id == entity_id).scalar()
+
+
+def make_pair():
+    venue = Venue(name='Stamp Venue', city='Austin', state='TX', address='1 Red River St',
+                  phone='512-555-0100', looking_talent=True)
+    artist = Artist(name='Stamp Artist', city='Austin', state='TX', phone='512-555-0101',
+                    seeking_venue=True)
+    db.session.add_all([venue, artist])
+    db.session.flush()
+    db.session.add(Match(venue_id=venue.id, artist_id=artist.id, score=0.9))
+    db.session.commit()
+    return venue.id, artist.id
+
+
+def test_seeking_flag_touches_suggesting_pages(app):
+    with app.app_context():
+        venue_id, artist_id = make_pair()
+        before = stamp(Venue, venue_id)
+        Artist.query.filter_by(id=artist_id).update({Artist.seeking_venue: False})
+        db.session.commit()
+        assert stamp(Venue, venue_id) > before
+
+        before = stamp(Artist, artist_id)
+        Venue.query.filter_by(id=venue_id).update({Venue.looking_talent: False})
+        db.session.commit()
+        assert stamp(Artist, artist_id) > before
+
+
+def test_deleting_a_match_side_touches_the_other(app):
+    with app.app_context():
+        venue_id, artist_id = make_pair()
+        before = stamp(Artist, artist_id)
+        Venue.query.filter_by(id=venue_id).delete()
+        db.session.commit()
+        assert stamp(Artist, artist_id) > before
+        assert Match.query.filter_by(artist_id=artist_id).count() == 0
+
+
+def test_unknown_venue_is_not_cached(app, client):
+    from cache import LRUBackend, response_cache
+    saved, response_cache.backend = response_cache.backend, LRUBackend()
+    try:
+        with app.app_context():
+            venue_id = db.session.query(db.func.max(Venue.id)).scalar() + 1000
+            assert client.get('/venues/%d' % venue_id).status_code == 404
+            # as another worker or `flask import` would: no invalidation reaches this cache
+            db.session.execute(Venue.__table__.insert().values(
+                id=venue_id, name='Late Venue', city='Austin', state='TX',
+                address='2 Red River St', phone='512-555-0102'))
+            db.session.commit()
+            response = client.get('/venues/%d' % venue_id)
+            assert response.status_code == 200
+            assert b'Late Venue' in response.data
+    finally:
+        response_cache.backend = saved
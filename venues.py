@@ -0,0 +1,242 @@
+import sys
+from itertools import groupby
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+from forms import VenueForm
+from models import db, Venue, VenueDirectory
+from pagination import keyset_paginate, page_args
+from queries import load_detail, search, genre_filter, GENRES_BY_LOWER
+from cache import cached, add_cache_tags
+from conditional import conditional, catalog_stamp, entity_stamp
+from matching import suggestions_for
+from routing import read_replica
+from sql_profile import query_budget
+from show_stats import rolled_at
+
+#----------------------------------------------------------------------------#
+# Venues.
+#----------------------------------------------------------------------------#
+
+blueprint = Blueprint('venues', __name__)
+
+@blueprint.route('/venues')
+@read_replica
+@query_budget(2)
+@conditional(catalog_stamp)
+@cached('list:venues')
+def venues():
+  # one ordered query for a page of venues with their upcoming show counts,
+  # grouped into areas in python so the page cost does not grow with the
+  # number of cities. the keyset starts with state/city so areas stay together
+  if current_app.config['VENUES_FROM_DIRECTORY_VIEW']:
+    directory = VenueDirectory.c
+    query = db.session.query(directory.city, directory.state, directory.id, directory.name,
+                             directory.num_upcoming_shows)
+    keys = [directory.state, directory.city, directory.name, directory.id]
+  else:
+    query = db.session.query(
+        Venue.city, Venue.state, Venue.id, Venue.name,
+        Venue.upcoming_shows_count.label('num_upcoming_shows'))
+    keys = [Venue.state, Venue.city, Venue.name, Venue.id]
+  genre = GENRES_BY_LOWER.get(request.args.get('genre', '').lower())
+  if genre:
+    query = query.filter(genre_filter(Venue, genre, id_column=keys[-1]))
+  page = keyset_paginate(query, keys, **page_args(request, current_app.config))
+  rows = page.items
+
+  data=[]
+  for (city, state), venues_in_area in groupby(rows, key=lambda row: (row.city, row.state)):
+    data.append({
+      "city": city,
+      "state": state,
+      "venues": [{
+        "id": venue.id,
+        "name": venue.name,
+        "num_upcoming_shows": venue.num_upcoming_shows
+      } for venue in venues_in_area]
+    })
+  return render_template('pages/venues.html', areas=data, page=page, genre=genre);
+
+@blueprint.route('/venues/search', methods=['POST'])
+@read_replica
+@query_budget(1)
+def search_venues():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for Hop should return "The Musical Hop".
+  # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+  # find all venues matching a word and should be case insesitive
+  venue_searched = request.form.get('search_term', '')
+  count, venue_queried = search(Venue, venue_searched, limit=current_app.config['SEARCH_LIMIT'])
+  response={
+    "count": count,
+    "data": venue_queried
+  }
+  return render_template('pages/search_venues.html', results=response, search_term=venue_searched)
+
+
+
+@blueprint.route('/venues/<int:venue_id>')
+@read_replica
+@query_budget(4)
+@conditional(entity_stamp(Venue, 'venue_id'))
+@cached('venue:{venue_id}')
+def show_venue(venue_id):
+  # shows the venue page with the given venue_id
+  # TODO: replace with real venue data from the venues table, using venue_id
+
+  # the venue plus its past and upcoming shows, in two queries, split by the
+  # show_stats clock so the lists agree with the counters and the page's stamp
+  queried_venue, past_shows, new_shows = load_detail(Venue, venue_id, now=rolled_at())
+  suggested_artists = suggestions_for(Venue, venue_id, limit=current_app.config['SUGGESTIONS_LIMIT'])
+  add_cache_tags(*['artist:%s' % show['artist_id'] for show in past_shows + new_shows + suggested_artists])
+
+  if queried_venue:
+    venue={
+      "id": queried_venue.id,
+      "name":queried_venue.name,
+      "genres": queried_venue.genres,
+      "address": queried_venue.address,
+      "city": queried_venue.city,
+      "state": queried_venue.state,
+      "phone": queried_venue.phone,
+      "website": queried_venue.website_link,
+      "facebook_link": queried_venue.facebook_link,
+      "looking_talent": queried_venue.looking_talent,
+      "seeking_talent": queried_venue.looking_talent,
+      "seeking_description": queried_venue.seeking_description,
+      "image_link": queried_venue.image_link,
+      "past_shows": past_shows,
+      "upcoming_shows": new_shows,
+      "past_shows_count": len(past_shows),
+      "upcoming_shows_count": len(new_shows),
+      "suggested_artists": suggested_artists,
+  }
+  
+    return render_template('pages/show_venue.html', venue=venue)
+  return render_template('errors/404.html'), 404
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@blueprint.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+
+@blueprint.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+  error = False
+  #get the data
+  form = VenueForm(request.form)
+  
+  #venue = Venue.query.filter_by(id=venue_id).first()
+  
+
+  venue = Venue(
+        name = form.name.data,
+        city = form.city.data,
+        state = form.state.data,
+        address = form.address.data,
+        phone = form.phone.data,
+        image_link = form.image_link.data,
+        facebook_link = form.facebook_link.data,
+        website_link  = form.website_link.data,
+        looking_talent= form.looking_talent.data,
+        seeking_description = form.seeking_description.data,
+        genres = request.form.getlist('genres'),
+  
+      ) 
+  
+    
+  try:
+    if form.validate():  
+      db.session.add(venue)
+      db.session.commit()
+    # TODO: on unsuccessful db insert, flash an error instead.
+
+      # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+      # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+      # on successful db insert, flash success
+      flash('Venue ' + form.name.data + ' was successfully listed!')
+    else:
+        for field, message in form.errors.items():
+            flash(field + ' - ' + str(message), 'danger') 
+                 
+  except:
+      error=True
+      db.session.rollback()
+      flash('An error occurred. Venue ' + form.name.data + ' could not be listed.')
+      print(sys.exc_info())
+  finally:
+      db.session.close()
+      
+  
+  return render_template('pages/home.html', form=form)
+
+
+
+@blueprint.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+  # TODO: Complete this endpoint for taking a venue_id, and using
+  # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+  try:
+    Venue.query.filter_by(id=venue_id).delete()
+    db.session.commit()
+  except:
+      db.session.rollback()
+      flash('Venue Could not be Deleted')
+  finally:
+      db.session.close()
+   
+
+  # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+  return render_template('pages/home.html')
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+@blueprint.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  # TODO: populate form with values from venue with ID <venue_id>
+  form = VenueForm()
+  queried_venue = Venue.query.filter_by(id=venue_id).first()
+  
+  return render_template('forms/edit_venue.html', form=form, venue=queried_venue)
+
+
+@blueprint.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  # TODO: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+  error = False
+  form =  VenueForm()
+  # get the data
+  queried = Venue.query.filter_by(id=venue_id).first()
+  if form.validate():
+    try:
+      venue = Venue(
+        name = request.form.name,
+        city = request.form.city,
+        state = request.form.state,
+        address = request.form.address,
+        phone = request.form.phone,
+        image_link = request.form.image_link,
+        facebook_link = request.form.facebook_link,
+        website_link = request.form.website_link,
+        looking_talent = request.form.looking_talent,
+        seeking_description = request.form.seeking_description,
+        genres = request.form.genres
+
+      )
+      db.session.add(venue)
+      db.session.commit()
+    except:
+      error=True
+      db.session.rollback()
+    finally:
+      db.session.close()     
+  return redirect(url_for('.show_venue', venue_id=venue_id))